@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from app.core.config import settings
+
+MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU en memoria del proceso, con expiracion por entrada y tamaño maximo."""
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl_seconds: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CacheBackend(Protocol):
+    """Backend compartido entre workers (p. ej. Redis)."""
+
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None: ...
+
+    def incr(self, key: str) -> int: ...
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        import redis  # dependencia opcional, solo si CACHE_REDIS_URL esta configurado
+
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> bytes | None:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        self._client.set(key, value, ex=max(int(ttl_seconds), 1))
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+
+def _json_default(value):
+    # Modelos pydantic (p. ej. HomeOut) se guardan en el backend como su JSON
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+class VersionedCache:
+    """Cache de respuestas con un numero de version por namespace.
+
+    Las escrituras llaman `bump()`; las claves llevan la version, asi que todo lo
+    anterior deja de usarse de inmediato (y expira solo por TTL/LRU).
+    Con backend compartido la version vive en el backend y la ven todos los workers
+    (cada uno la relee como mucho cada `version_ttl_seconds`).
+
+    `key_for()` fija la version una sola vez por request: get() y set() reciben esa clave,
+    asi un bump() durante el calculo no guarda el resultado viejo bajo la version nueva.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int,
+        ttl_seconds: float,
+        backend: CacheBackend | None = None,
+        version_ttl_seconds: float = 1.0,
+    ):
+        self.namespace = namespace
+        self.local = TTLCache(maxsize, ttl_seconds)
+        self.backend = backend
+        self.version_ttl_seconds = version_ttl_seconds
+        self._version = 0
+        # (version del backend, monotonic de la lectura)
+        self._backend_version: tuple[int, float] | None = None
+        self.backend_hits = 0
+        self.backend_errors = 0
+        self.bumps = 0
+
+    def version(self) -> int:
+        if self.backend is None:
+            return self._version
+        cached = self._backend_version
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < self.version_ttl_seconds:
+            return cached[0]
+        try:
+            raw = self.backend.get(f"{self.namespace}:version")
+        except Exception:
+            self.backend_errors += 1
+            return cached[0] if cached is not None else self._version
+        version = int(raw) if raw else 0
+        self._backend_version = (version, now)
+        return version
+
+    def bump(self) -> None:
+        self.bumps += 1
+        self._version += 1
+        if self.backend is not None:
+            try:
+                self._backend_version = (self.backend.incr(f"{self.namespace}:version"), time.monotonic())
+            except Exception:
+                self.backend_errors += 1
+                self._backend_version = None
+        self.local.clear()
+
+    def key_for(self, key) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self.namespace, f"v{self.version()}", *(str(part) for part in parts)])
+
+    def get(self, full_key: str):
+        value = self.local.get(full_key)
+        if value is not MISSING or self.backend is None:
+            return value
+
+        try:
+            raw = self.backend.get(full_key)
+        except Exception:
+            self.backend_errors += 1
+            return MISSING
+        if raw is None:
+            return MISSING
+        self.backend_hits += 1
+        value = json.loads(raw)
+        self.local.set(full_key, value)
+        return value
+
+    def set(self, full_key: str, value) -> None:
+        self.local.set(full_key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(full_key, json.dumps(value, default=_json_default).encode(), self.local.ttl_seconds)
+            except Exception:
+                self.backend_errors += 1
+
+    def stats(self) -> dict:
+        return {
+            **self.local.stats(),
+            "version": self.version(),
+            "bumps": self.bumps,
+            "shared_backend": type(self.backend).__name__ if self.backend is not None else None,
+            "backend_hits": self.backend_hits,
+            "backend_errors": self.backend_errors,
+        }
+
+
+def _shared_backend() -> CacheBackend | None:
+    if settings.CACHE_REDIS_URL:
+        return RedisBackend(settings.CACHE_REDIS_URL)
+    return None
+
+
+home_cache = VersionedCache(
+    "home",
+    maxsize=settings.HOME_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.HOME_CACHE_TTL_SECONDS,
+    backend=_shared_backend(),
+    version_ttl_seconds=settings.CACHE_VERSION_TTL_SECONDS,
+)
+
+
+def invalidate_home() -> None:
+    home_cache.bump()
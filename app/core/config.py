@@ -1,11 +1,53 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DB_URL: str
+    DB_MIGRATE_ON_STARTUP: bool = True
+    # Pool por proceso: (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers debe caber en max_connections de MySQL
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # /public/* con handlers async (aiomysql / aiosqlite); DB_ASYNC_URL se deriva de DB_URL si falta
+    DB_ASYNC_PUBLIC: bool = False
+    DB_ASYNC_URL: str | None = None
+    # Replica de lectura para /public (si falla se usa el primario y se reintenta tras este tiempo)
+    DB_REPLICA_URL: str | None = None
+    DB_REPLICA_RETRY_SECONDS: int = 30
     JWT_SECRET: str
     JWT_EXPIRE_MIN: int = 60 * 24 * 30
+    # Cache por worker de token -> usuario. Un cambio o borrado de usuario se ve al instante
+    # en el worker que lo hizo; en los demas tarda hasta esto (un usuario borrado sigue
+    # autenticado ahi ese tiempo). Bajarlo acorta esa ventana a cambio de mas SELECTs.
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    RESET_CODE_SECRET: str | None = None
+    PASSWORD_RESET_PURGE_INTERVAL_SECONDS: int = 60 * 60
+    # Codigos fallidos (verify/confirm) antes de invalidar todos los codigos pendientes del usuario
+    PASSWORD_RESET_MAX_ATTEMPTS: int = 5
     MEDIA_DIR: str = "./media"
     PUBLIC_MEDIA_BASE: str = "https://quetzartpi.gpolufesa.com/media"
+    MEDIA_MAX_UPLOAD_BYTES: int = 15 * 1024 * 1024
+    # Tope del cuerpo completo (registro con galeria, varias imagenes por request); 0 = sin tope
+    MAX_REQUEST_BODY_BYTES: int = 64 * 1024 * 1024
+    MEDIA_DERIVATIVES: bool = True
+    MEDIA_DERIVATIVE_WORKERS: int = 2
+    MEDIA_SAVE_WORKERS: int = 4
+    # Barrido de archivos sin fila que los use; solo los mas viejos que el margen (0 = apagado)
+    MEDIA_SWEEP_INTERVAL_SECONDS: int = 6 * 60 * 60
+    MEDIA_SWEEP_GRACE_SECONDS: int = 24 * 60 * 60
+    # local (MEDIA_DIR) | s3; con s3, PUBLIC_MEDIA_BASE apunta al bucket/CDN (incluido el prefijo)
+    MEDIA_STORAGE: Literal["local", "s3"] = "local"
+    MEDIA_S3_BUCKET: str | None = None
+    MEDIA_S3_PREFIX: str = ""
+    MEDIA_S3_ENDPOINT_URL: str | None = None
+    MEDIA_S3_REGION: str | None = None
     BANK_NAME: str 
     BANK_ACCOUNT: str 
     BANK_CLABE: str 
@@ -15,6 +57,31 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     SMTP_FROM: str | None = None
     SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: int = 15
+    SMTP_POOL_SIZE: int = 2
+    EMAIL_OUTBOX_INTERVAL_SECONDS: int = 5
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: int = 30
+    # Las filas se reclaman en una transaccion corta y se envian fuera de ella; si el worker
+    # muere a medio envio, vuelven a estar pendientes pasado este tiempo
+    EMAIL_CLAIM_SECONDS: int = 10 * 60
+    EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS: int = 60 * 60
+    EMAIL_OUTBOX_RETENTION_SECONDS: int = 7 * 24 * 60 * 60
+    HOME_POOL_SIZE: int = 2000
+    HOME_POOL_TTL_SECONDS: int = 300
+    HOME_CACHE_TTL_SECONDS: int = 30
+    HOME_CACHE_MAX_ENTRIES: int = 256
+    CACHE_REDIS_URL: str | None = None
+    # Cada worker relee la version del backend como mucho cada tantos segundos: un bump() de
+    # otro worker tarda hasta esto en verse (el del propio worker se ve de inmediato)
+    CACHE_VERSION_TTL_SECONDS: float = 1.0
+
+    REQUEST_TIMING: bool = True
+    # @query_budget y deteccion de N+1: off | warn (log) | raise (tests / staging)
+    QUERY_BUDGET_MODE: Literal["off", "warn", "raise"] = "off"
+    QUERY_REPEAT_THRESHOLD: int = 5
+
     class Config:
         env_file = ".env"
 
@@ -1,26 +1,301 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from email.message import EmailMessage
+import logging
 import smtplib
+import threading
+import time
+from typing import NamedTuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.tasks import PeriodicTask, register_task
+from app.db.session import SessionLocal
+from app.models import EmailOutbox
 
+logger = logging.getLogger(__name__)
 
-def send_password_reset_code(to_email: str, code: str) -> None:
-    if not settings.SMTP_HOST or not settings.SMTP_FROM:
-        raise RuntimeError("SMTP settings are not configured")
+PASSWORD_RESET_SUBJECT = "Codigo de recuperacion Quetzart"
 
-    message = EmailMessage()
-    message["Subject"] = "Codigo de recuperacion Quetzart"
-    message["From"] = settings.SMTP_FROM
-    message["To"] = to_email
-    message.set_content(
+# Conexion sin uso por mas de esto se valida con NOOP antes de reutilizarla
+SMTP_NOOP_AFTER_SECONDS = 30
+
+
+def smtp_configured() -> bool:
+    return bool(settings.SMTP_HOST and settings.SMTP_FROM)
+
+
+def password_reset_body(code: str) -> str:
+    return (
         "Hola,\n\n"
         f"Tu codigo para recuperar tu contrasena en Quetzart es: {code}\n\n"
         "Este codigo vence en 10 minutos. Si no solicitaste este cambio, ignora este correo.\n"
     )
 
-    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as smtp:
-        if settings.SMTP_USE_TLS:
-            smtp.starttls()
-        if settings.SMTP_USER and settings.SMTP_PASSWORD:
-            smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-        smtp.send_message(message)
+
+def build_message(to_email: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = settings.SMTP_FROM
+    message["To"] = to_email
+    message.set_content(body)
+    return message
+
+
+class SMTPConnectionPool:
+    """Reutiliza conexiones SMTP ya autenticadas (evita connect + STARTTLS + login por correo)."""
+
+    def __init__(self, max_idle: int):
+        self.max_idle = max_idle
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.reuses = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.SMTP_USE_TLS:
+                smtp.starttls()
+            if settings.SMTP_USER and settings.SMTP_PASSWORD:
+                smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except Exception:
+            _close(smtp)
+            raise
+        self.connects += 1
+        return smtp
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                smtp, last_used = self._idle.pop()
+            if time.monotonic() - last_used < SMTP_NOOP_AFTER_SECONDS:
+                self.reuses += 1
+                return smtp
+            try:
+                if smtp.noop()[0] == 250:
+                    self.reuses += 1
+                    return smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            _close(smtp)
+        return self._connect()
+
+    def _checkin(self, smtp: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((smtp, time.monotonic()))
+                return
+        _close(smtp)
+
+    @contextmanager
+    def connection(self):
+        smtp = self._checkout()
+        try:
+            yield smtp
+        except Exception:
+            # No sabemos en que estado quedo la sesion SMTP: se descarta
+            _close(smtp)
+            raise
+        self._checkin(smtp)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            _close(smtp)
+
+
+def _close(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+
+
+smtp_pool = SMTPConnectionPool(settings.SMTP_POOL_SIZE)
+
+
+def enqueue_email(
+    db: Session, to_email: str, subject: str, body: str, expires_at: datetime | None = None,
+) -> EmailOutbox:
+    # Se guarda en la misma transaccion que el resto del request; lo envia OutboxSender.
+    # Pasado expires_at ya no se envia (y se le borra el cuerpo)
+    row = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+        expires_at=expires_at,
+    )
+    db.add(row)
+    return row
+
+
+def enqueue_password_reset_code(db: Session, to_email: str, code: str, expires_at: datetime) -> EmailOutbox:
+    return enqueue_email(db, to_email, PASSWORD_RESET_SUBJECT, password_reset_body(code), expires_at)
+
+
+def describe_error(error: Exception) -> str:
+    # Sin la direccion del destinatario (SMTPRecipientsRefused la trae en str())
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [f"{code} {message.decode(errors='replace')}" for code, message in error.recipients.values()]
+        return f"recipient refused: {'; '.join(codes)}"
+    return f"{type(error).__name__}: {error}"
+
+
+class ClaimedEmail(NamedTuple):
+    id: int
+    to_email: str
+    subject: str
+    body: str
+    attempts: int
+    expires_at: datetime | None
+
+
+class OutboxSender:
+    def __init__(self, pool: SMTPConnectionPool):
+        self.pool = pool
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._warned_unconfigured = False
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        # 30s, 60s, 120s, ... con tope de 1 hora
+        return timedelta(seconds=min(settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+    def send_batch(self) -> int:
+        if not smtp_configured():
+            if not self._warned_unconfigured:
+                logger.warning("SMTP settings are not configured; outbox messages stay pending")
+                self._warned_unconfigured = True
+            return 0
+
+        claimed = self._claim()
+        # El SMTP va fuera de la transaccion: no hay locks abiertos mientras se envia
+        results = [(email, self._deliver(email)) for email in claimed]
+        if results:
+            self._record(results)
+        return len(claimed)
+
+    def _claim(self) -> list[ClaimedEmail]:
+        # Transaccion corta: toma las filas y les corre next_attempt_at EMAIL_CLAIM_SECONDS.
+        # Si el worker muere a medio envio, las filas vuelven a estar pendientes al vencer.
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            rows = (
+                db.query(EmailOutbox)
+                .filter(
+                    EmailOutbox.status == "pending",
+                    EmailOutbox.next_attempt_at <= now,
+                    or_(EmailOutbox.expires_at.is_(None), EmailOutbox.expires_at > now),
+                )
+                .order_by(EmailOutbox.id)
+                .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)  # varios workers no toman las mismas filas
+                .all()
+            )
+            claimed = []
+            for row in rows:
+                row.attempts += 1
+                row.next_attempt_at = now + timedelta(seconds=settings.EMAIL_CLAIM_SECONDS)
+                claimed.append(ClaimedEmail(row.id, row.to_email, row.subject, row.body, row.attempts, row.expires_at))
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _deliver(self, email: ClaimedEmail) -> Exception | None:
+        try:
+            with self.pool.connection() as smtp:
+                smtp.send_message(build_message(email.to_email, email.subject, email.body))
+        except Exception as e:
+            return e
+        return None
+
+    def _record(self, results: list[tuple[ClaimedEmail, Exception | None]]) -> None:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            for email, error in results:
+                db.query(EmailOutbox).filter(EmailOutbox.id == email.id).update(
+                    self._outcome(email, error, now), synchronize_session=False,
+                )
+            db.commit()
+        finally:
+            db.close()
+
+    def _outcome(self, email: ClaimedEmail, error: Exception | None, now: datetime) -> dict:
+        # El cuerpo puede llevar un codigo de recuperacion: se borra en cuanto la fila termina
+        if error is None:
+            self.sent += 1
+            return {"status": "sent", "sent_at": now, "body": "", "last_error": None}
+
+        next_attempt_at = now + self.retry_delay(email.attempts)
+        if email.attempts >= settings.EMAIL_MAX_ATTEMPTS or (email.expires_at and next_attempt_at >= email.expires_at):
+            self.failed += 1
+            logger.error("Email %s failed permanently: %s", email.id, describe_error(error))
+            return {"status": "failed", "body": "", "last_error": describe_error(error)[:2000]}
+
+        self.retried += 1
+        logger.warning("Email %s failed (attempt %s): %s", email.id, email.attempts, describe_error(error))
+        return {"next_attempt_at": next_attempt_at, "last_error": describe_error(error)[:2000]}
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "smtp_connects": self.pool.connects,
+            "smtp_reuses": self.pool.reuses,
+        }
+
+
+def purge_email_outbox(db: Session) -> tuple[int, int]:
+    # (vencidos, borrados). Los pendientes vencidos se marcan failed sin cuerpo aunque no
+    # haya SMTP configurado; los sent/failed se borran pasado EMAIL_OUTBOX_RETENTION_SECONDS.
+    now = datetime.utcnow()
+    expired = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status == "pending", EmailOutbox.expires_at <= now)
+        .update({"status": "failed", "body": "", "last_error": "expired"}, synchronize_session=False)
+    )
+    cutoff = now - timedelta(seconds=settings.EMAIL_OUTBOX_RETENTION_SECONDS)
+    deleted = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status.in_(("sent", "failed")), EmailOutbox.next_attempt_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return expired, deleted
+
+
+def _purge_email_outbox_job() -> None:
+    db = SessionLocal()
+    try:
+        expired, deleted = purge_email_outbox(db)
+        if expired or deleted:
+            logger.info("Email outbox: %s expired, %s purged", expired, deleted)
+    finally:
+        db.close()
+
+
+outbox_sender = OutboxSender(smtp_pool)
+outbox_task = register_task(PeriodicTask(
+    "email-outbox",
+    settings.EMAIL_OUTBOX_INTERVAL_SECONDS,
+    outbox_sender.send_batch,
+))
+register_task(PeriodicTask(
+    "email-outbox-purge",
+    settings.EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS,
+    _purge_email_outbox_job,
+))
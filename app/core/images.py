@@ -0,0 +1,130 @@
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Anchos fijos de las derivadas (WebP, sin EXIF): "<nombre>_w<ancho>.webp" junto al original
+DERIVATIVE_WIDTHS = {
+    "thumb": 320,
+    "card": 640,
+    "large": 1280,
+}
+DERIVATIVE_FORMAT = "webp"
+DERIVATIVE_QUALITY = 80
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def derivative_name(name: str, width: int) -> str:
+    stem = name.rsplit(".", 1)[0]
+    return f"{stem}_w{width}.{DERIVATIVE_FORMAT}"
+
+
+def is_derivative_name(name: str) -> bool:
+    stem = name.rsplit(".", 1)[0]
+    return any(stem.endswith(f"_w{width}") for width in DERIVATIVE_WIDTHS.values())
+
+
+def build_derivatives(path: str, widths: tuple[int, ...]) -> list[str]:
+    # Corre en un proceso del pool: decodifica una vez y escribe cada ancho
+    from PIL import Image, ImageOps
+
+    written = []
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)  # aplica la orientacion antes de descartar EXIF
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+        directory, name = os.path.split(path)
+        for width in widths:
+            out_path = os.path.join(directory, derivative_name(name, width))
+            if os.path.exists(out_path):
+                continue
+            resized = image.copy()
+            if resized.width > width:
+                resized.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+            tmp_path = f"{out_path}.part"
+            # Sin exif=/icc_profile=: la derivada sale sin metadatos
+            resized.save(tmp_path, format=DERIVATIVE_FORMAT.upper(), quality=DERIVATIVE_QUALITY, method=4)
+            os.replace(tmp_path, out_path)
+            written.append(out_path)
+    return written
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: el proceso web tiene hilos (threadpool de AnyIO) y fork con hilos no es seguro
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.MEDIA_DERIVATIVE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _log_failure(future) -> None:
+    error = future.exception()
+    if error is not None:
+        logger.warning("Image derivative generation failed: %s", error)
+
+
+def schedule_derivatives(path: str, on_done=None) -> bool:
+    # No bloquea el request: el trabajo de CPU queda en el pool de procesos.
+    # on_done(future) recibe la lista de archivos escritos (p. ej. para subirlos a S3).
+    if not settings.MEDIA_DERIVATIVES:
+        return False
+    try:
+        future = _get_executor().submit(build_derivatives, path, tuple(DERIVATIVE_WIDTHS.values()))
+    except RuntimeError:
+        logger.exception("Image derivative pool unavailable")
+        return False
+    future.add_done_callback(_log_failure)
+    if on_done is not None:
+        future.add_done_callback(on_done)
+    return True
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def main() -> None:
+    # Backfill: python -m app.core.images [MEDIA_DIR]  (con MEDIA_STORAGE=s3, el bucket)
+    if settings.MEDIA_STORAGE == "s3":
+        from app.core.storage import get_storage
+
+        print(f"{get_storage().backfill_derivatives()} originals backfilled")
+        return
+
+    media_dir = sys.argv[1] if len(sys.argv) > 1 else settings.MEDIA_DIR
+    widths = tuple(DERIVATIVE_WIDTHS.values())
+    for root, dirs, files in os.walk(media_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, media_dir)
+            if filename.endswith(".part") or is_derivative_name(filename):
+                continue
+            _backfill(path, name, widths)
+
+
+def _backfill(path: str, name: str, widths: tuple[int, ...]) -> None:
+    try:
+        written = build_derivatives(path, widths)
+    except Exception as e:
+        print(f"skip {name}: {e}")
+        return
+    if written:
+        print(f"{name}: {len(written)} derivatives")
+
+
+if __name__ == "__main__":
+    main()
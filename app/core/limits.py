@@ -0,0 +1,53 @@
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+
+def _too_large(limit: int) -> str:
+    return f"Request body exceeds {limit} bytes"
+
+
+class RequestSizeLimitMiddleware:
+    """ASGI puro: corta el cuerpo del request en MAX_REQUEST_BODY_BYTES.
+
+    Con Content-Length se responde 413 antes de leer nada; sin el (chunked) se cuenta lo
+    que llega y se falla en cuanto se pasa, antes de que Starlette termine de volcar el
+    multipart a disco o de cargar el JSON completo.
+    """
+
+    def __init__(self, app, max_bytes: int | None = None):
+        self.app = app
+        self.max_bytes = settings.MAX_REQUEST_BODY_BYTES if max_bytes is None else max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.max_bytes
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    response = JSONResponse({"detail": _too_large(limit)}, status_code=413, headers={"Connection": "close"})
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def receive_wrapper():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Sube desde request.form()/body() hasta el handler de HTTPException: 413
+                    raise HTTPException(413, _too_large(limit))
+            return message
+
+        await self.app(scope, receive_wrapper, send)
@@ -0,0 +1,73 @@
+"""Borra del storage los archivos que ninguna fila referencia.
+
+Los archivos van por hash y se deduplican: un request no puede borrar lo que escribio si
+su transaccion falla, porque otro request pudo reutilizar el mismo archivo mientras tanto.
+Los huerfanos (transaccion fallida, obra/evento borrado, imagen reemplazada) se recogen aqui,
+solo si llevan mas de MEDIA_SWEEP_GRACE_SECONDS sin escribirse ni reutilizarse.
+"""
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.storage import get_storage, media_key
+from app.core.tasks import PeriodicTask, register_task
+from app.db.session import SessionLocal
+from app.models import Event, Profile, ProfileGallery
+
+logger = logging.getLogger(__name__)
+
+MEDIA_COLUMNS = (Profile.profile_image_url, ProfileGallery.image_url, Event.image_url)
+
+
+def referenced_keys(db: Session) -> set[str]:
+    keys = set()
+    for column in MEDIA_COLUMNS:
+        rows = db.execute(select(column).where(column.isnot(None)).execution_options(yield_per=5000))
+        for (url,) in rows:
+            key = media_key(url)
+            if key:
+                keys.add(key)
+    return keys
+
+
+def sweep_unreferenced_media(db: Session, grace_seconds: float | None = None) -> int:
+    if grace_seconds is None:
+        grace_seconds = settings.MEDIA_SWEEP_GRACE_SECONDS
+    # El corte se fija antes de leer las referencias. Un archivo nuevo o reutilizado (put()
+    # le renueva la fecha) por una fila que aun no hace commit queda despues del corte.
+    cutoff = time.time() - grace_seconds
+    referenced = referenced_keys(db)
+    db.rollback()
+
+    storage = get_storage()
+    deleted = 0
+    for key in storage.list_keys():
+        if key in referenced:
+            continue
+        # La fecha se relee justo antes de borrar: pudo reutilizarse durante el barrido
+        modified = storage.modified_at(key)
+        if modified is None or modified > cutoff:
+            continue
+        storage.delete(key)
+        deleted += 1
+    return deleted
+
+
+def _sweep_media_job() -> None:
+    db = SessionLocal()
+    try:
+        deleted = sweep_unreferenced_media(db)
+        if deleted:
+            logger.info("Swept %s unreferenced media files", deleted)
+    finally:
+        db.close()
+
+
+media_sweep_task = register_task(PeriodicTask(
+    "media-sweep",
+    settings.MEDIA_SWEEP_INTERVAL_SECONDS,
+    _sweep_media_job,
+))
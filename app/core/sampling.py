@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+from typing import Callable, Iterable
+
+
+def reservoir_sample(ids: Iterable[int], capacity: int, rng: random.Random) -> list[int]:
+    # Algoritmo R: una sola pasada, memoria O(capacity) sin importar el tamaño de la tabla
+    pool: list[int] = []
+    for seen, item in enumerate(ids):
+        if seen < capacity:
+            pool.append(item)
+        else:
+            slot = rng.randint(0, seen)
+            if slot < capacity:
+                pool[slot] = item
+    return pool
+
+
+class RandomIdPool:
+    """Muestra aleatoria de ids que se recalcula cada `ttl_seconds`.
+
+    `loader(db)` devuelve un iterable de ids (idealmente solo la PK, leida por indice).
+    Entre recargas, `sample()` no toca la base de datos.
+    """
+
+    def __init__(self, loader: Callable, capacity: int, ttl_seconds: float):
+        self.loader = loader
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._ids: list[int] | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()  # una sola recarga a la vez (se tiene durante la consulta)
+        self._ids_lock = threading.Lock()  # reemplazo de _ids: refresh() vs discard()
+        self._rng = random.Random()
+
+    @property
+    def loaded(self) -> bool:
+        return self._ids is not None
+
+    def _stale(self) -> bool:
+        return self._ids is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def refresh(self, db) -> None:
+        ids = reservoir_sample(self.loader(db), self.capacity, self._rng)
+        with self._ids_lock:
+            self._ids = ids
+            self._loaded_at = time.monotonic()
+
+    def sample(self, db, k: int, wait: bool = True) -> list[int]:
+        if self._stale():
+            # Solo un hilo recarga; los demas siguen con el pool anterior si ya existe.
+            # wait=False nunca bloquea (event loop): sin pool cargado devuelve [] mientras otro recarga
+            blocking = wait and self._ids is None
+            if self._lock.acquire(blocking=blocking):
+                try:
+                    if self._stale():
+                        self.refresh(db)
+                finally:
+                    self._lock.release()
+
+        ids = self._ids or []
+        return self._rng.sample(ids, min(k, len(ids)))
+
+    def discard(self, ids: Iterable[int]) -> None:
+        # Ids que ya no existen (borrados desde la ultima recarga)
+        # No toma _lock (puede estar tomado durante una recarga larga); sin _ids_lock un
+        # discard concurrente pisaria el pool recien recargado con el anterior filtrado
+        gone = set(ids)
+        if not gone:
+            return
+        with self._ids_lock:
+            if self._ids:
+                self._ids = [item for item in self._ids if item not in gone]
+
+
+def order_by_ids(rows, ids: list[int], key: Callable = lambda r: r.id) -> tuple[list, list[int]]:
+    # Respeta el orden aleatorio de `ids` y reporta los que no regresaron
+    by_id = {key(row): row for row in rows}
+    ordered = [by_id[item] for item in ids if item in by_id]
+    missing = [item for item in ids if item not in by_id]
+    return ordered, missing
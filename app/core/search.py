@@ -0,0 +1,47 @@
+import unicodedata
+
+ACCENT_REPLACEMENTS = (
+    ("á", "a"), ("à", "a"), ("ä", "a"), ("â", "a"),
+    ("é", "e"), ("è", "e"), ("ë", "e"), ("ê", "e"),
+    ("í", "i"), ("ì", "i"), ("ï", "i"), ("î", "i"),
+    ("ó", "o"), ("ò", "o"), ("ö", "o"), ("ô", "o"),
+    ("ú", "u"), ("ù", "u"), ("ü", "u"), ("û", "u"),
+    ("ñ", "n"),
+)
+
+
+def normalize_search_text(value: str) -> str:
+    value = value.strip().lower()
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    for accented, plain in ACCENT_REPLACEMENTS:
+        value = value.replace(accented, plain)
+    return value
+
+
+# Trigramas del texto normalizado: "term in search_name" implica que cada trigrama del
+# termino es trigrama de search_name, asi que el indice solo descarta, nunca pierde filas
+SEARCH_GRAM_LENGTH = 3
+
+
+def search_grams(value: str | None) -> list[str]:
+    # Sobre el texto ya normalizado (espacios y signos incluidos); [] si es mas corto que un trigrama
+    if not value or len(value) < SEARCH_GRAM_LENGTH:
+        return []
+    return sorted({value[i:i + SEARCH_GRAM_LENGTH] for i in range(len(value) - SEARCH_GRAM_LENGTH + 1)})
+
+
+def search_gram_rows(user_id: int, search_name: str | None, search_style: str | None) -> list[dict]:
+    # Filas de profile_search_grams para un perfil (a partir de profiles.search_*)
+    return [
+        {"user_id": user_id, "field": field, "gram": gram}
+        for field, value in (("name", search_name), ("style", search_style))
+        for gram in search_grams(value)
+    ]
+
+
+def search_column_value(value: str | None) -> str | None:
+    # Lo que se guarda en profiles.search_*; None para que nunca haga match
+    if not value:
+        return None
+    return normalize_search_text(value)
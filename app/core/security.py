@@ -1,10 +1,108 @@
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from jose import JWTError
 from datetime import datetime, timedelta
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max_desired_rounds = BCRYPT_ROUNDS: cualquier hash con otro costo "needs_update"
+# y se regenera en el siguiente login (ver verify_and_update_password).
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_desired_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_desired_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class PasswordQueueFull(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Pool dedicado y acotado para bcrypt.
+
+    Un login en rafaga ya no ocupa los hilos de AnyIO que atienden las lecturas
+    publicas: los handlers hacen `await` mientras el hash corre aqui. Si hay mas de
+    `workers + max_pending` trabajos se rechaza de inmediato (PasswordQueueFull).
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordQueueFull()
+
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+
+        def run():
+            started_at = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished_at = time.perf_counter()
+                wait = started_at - enqueued_at
+                with self._lock:
+                    self.in_flight -= 1
+                    self.completed += 1
+                    self.queue_wait_total += wait
+                    self.queue_wait_max = max(self.queue_wait_max, wait)
+                    self.run_time_total += finished_at - started_at
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+            raise
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "in_flight": self.in_flight,
+                "queue_wait_avg_ms": round(self.queue_wait_total / completed * 1000, 3),
+                "queue_wait_max_ms": round(self.queue_wait_max * 1000, 3),
+                "run_time_avg_ms": round(self.run_time_total / completed * 1000, 3),
+            }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -12,6 +110,21 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
+
+
+async def verify_and_update_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    # (valido, nuevo_hash): nuevo_hash != None cuando el costo/esquema quedo desactualizado
+    return await password_hasher.run(pwd_context.verify_and_update, password, password_hash)
+
+
+def reset_code_digest(user_id: int, code: str) -> str:
+    # HMAC con llave del servidor: se busca por igualdad (indice) en vez de bcrypt por candidato
+    key = (settings.RESET_CODE_SECRET or settings.JWT_SECRET).encode()
+    return hmac.new(key, f"{user_id}:{code}".encode(), hashlib.sha256).hexdigest()
+
 def create_access_token(sub: str, role: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MIN)
     payload = {"sub": sub, "role": role, "exp": expire}
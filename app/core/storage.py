@@ -0,0 +1,295 @@
+"""Almacenamiento de media.
+
+Las filas guardan la clave relativa ("ab/cd/<sha256>.jpg") y la URL publica se arma con
+PUBLIC_MEDIA_BASE: cambiar de dominio o poner un CDN no requiere reescribir filas.
+
+- LocalStorage: archivos bajo MEDIA_DIR, servidos por MediaFiles en /media.
+- S3Storage: bucket S3 o compatible (MinIO, un stand-in local...) con MEDIA_S3_ENDPOINT_URL.
+"""
+import logging
+import mimetypes
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.core.images import DERIVATIVE_WIDTHS, build_derivatives, derivative_name, schedule_derivatives
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Derivada aun no generada: se sirve el original, pero sin "immutable"
+FALLBACK_CACHE_CONTROL = "public, max-age=60"
+# ab/cd/<sha256>.<ext> (y sus derivadas <sha256>_w<ancho>.webp)
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(_w\d+)?\.[a-z0-9]+$")
+ORIGINAL_NAME = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$")
+EXTERNAL_PREFIXES = ("http://", "https://", "//", "data:")
+
+
+def media_key(url: str | None) -> str | None:
+    # Clave dentro del storage, o None si la URL es externa.
+    # Acepta tambien el formato viejo: URL completa ".../media/<nombre>" o "media/<nombre>"
+    if not url:
+        return None
+
+    marker = "/media/"
+    if marker in url:
+        return url.rsplit(marker, 1)[1].lstrip("/")
+
+    if url.startswith("media/"):
+        return url.split("/", 1)[1]
+
+    if url.startswith(EXTERNAL_PREFIXES) or url.startswith("/"):
+        return None
+
+    return url
+
+
+def check_key(key: str) -> str:
+    # Solo claves por hash: nada de "..", rutas absolutas ni separadores extra
+    if not CONTENT_ADDRESSED_NAME.match(key):
+        raise ValueError(f"Invalid media key: {key!r}")
+    return key
+
+
+def derivative_keys(key: str) -> list[str]:
+    return [derivative_name(key, width) for width in DERIVATIVE_WIDTHS.values()]
+
+
+class LocalStorage:
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, check_key(key))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put(self, tmp_path: str, key: str) -> bool:
+        # tmp_path debe estar en el mismo filesystem (os.replace atomico).
+        # False si la clave ya existia: se reutiliza y el temporal se descarta. Se le renueva
+        # la fecha para que el barrido de huerfanos no la borre antes del commit que la usa.
+        path = self.path(key)
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass  # el barrido la borro entre exists() y utime(): se vuelve a escribir
+            else:
+                os.remove(tmp_path)
+                return False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        schedule_derivatives(path)
+        return True
+
+    def modified_at(self, key: str) -> float | None:
+        try:
+            return os.stat(self.path(key)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def list_keys(self):
+        # Solo originales; las derivadas se borran con su original. Se omiten .tmp y .stage
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+                if ORIGINAL_NAME.match(key):
+                    yield key
+
+    def delete(self, key: str) -> None:
+        # Original y las derivadas que el pool ya haya alcanzado a escribir
+        for candidate in [key, *derivative_keys(key)]:
+            try:
+                os.remove(self.path(candidate))
+            except FileNotFoundError:
+                pass
+
+
+class S3Storage:
+    """Objetos en un bucket S3 (o compatible).
+
+    Las derivadas se generan en el pool de procesos sobre una copia en MEDIA_DIR/.stage y
+    se suben al terminar. Mientras tanto (o si la generacion falla) cada URL de derivada
+    tiene una copia del original con FALLBACK_CACHE_CONTROL, como el fallback de MediaFiles:
+    un bucket no puede responder con otro objeto cuando falta el pedido.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        client=None,
+    ):
+        if client is None:
+            import boto3  # dependencia opcional, solo con MEDIA_STORAGE=s3
+
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.stage_dir = os.path.join(settings.MEDIA_DIR, ".stage")
+        self._uploads = ThreadPoolExecutor(max_workers=2, thread_name_prefix="media-s3")
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{check_key(key)}"
+
+    def _head(self, key: str) -> dict | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def modified_at(self, key: str) -> float | None:
+        head = self._head(key)
+        return head["LastModified"].timestamp() if head else None
+
+    def _list_objects(self):
+        # (clave, tamaño) de todo lo que hay bajo el prefijo
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                yield item["Key"][len(self.prefix):], item["Size"]
+
+    def list_keys(self):
+        for key, _ in self._list_objects():
+            if ORIGINAL_NAME.match(key):
+                yield key
+
+    @staticmethod
+    def object_args(key: str, cache_control: str = IMMUTABLE_CACHE_CONTROL) -> dict:
+        return {
+            "ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream",
+            "CacheControl": cache_control,
+        }
+
+    def upload(self, path: str, key: str) -> None:
+        self.client.upload_file(path, self.bucket, self.object_key(key), ExtraArgs=self.object_args(key))
+
+    def copy(self, source_key: str, key: str, object_args: dict) -> None:
+        # Dentro del bucket: no vuelve a subir el contenido
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=self.object_key(key),
+            CopySource={"Bucket": self.bucket, "Key": self.object_key(source_key)},
+            MetadataDirective="REPLACE",
+            **object_args,
+        )
+
+    def touch(self, key: str) -> None:
+        # Copia sobre si mismo: renueva LastModified
+        self.copy(key, key, self.object_args(key))
+
+    def copy_original_to_derivatives(self, key: str) -> None:
+        # Tipo y cache del original: es el original, aunque la URL diga .webp
+        fallback_args = self.object_args(key, FALLBACK_CACHE_CONTROL)
+        for derivative in derivative_keys(key):
+            self.copy(key, derivative, fallback_args)
+
+    def put(self, tmp_path: str, key: str) -> bool:
+        if self.exists(key):
+            # Reutilizada: igual que en LocalStorage, fecha nueva para el barrido de huerfanos
+            os.remove(tmp_path)
+            self.touch(key)
+            return False
+
+        try:
+            self.upload(tmp_path, key)
+            self.copy_original_to_derivatives(key)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        stage_path = os.path.join(self.stage_dir, key)
+        os.makedirs(os.path.dirname(stage_path), exist_ok=True)
+        os.replace(tmp_path, stage_path)
+
+        def on_done(future):
+            # Fuera del hilo de callbacks del pool de procesos: la subida es I/O de red
+            self._uploads.submit(self._upload_derivatives, future, stage_path)
+
+        if not schedule_derivatives(stage_path, on_done):
+            os.remove(stage_path)
+        return True
+
+    def _upload_derivatives(self, future, stage_path: str) -> None:
+        try:
+            if not future.cancelled() and future.exception() is None:
+                for path in future.result():
+                    self.upload(path, os.path.relpath(path, self.stage_dir).replace(os.sep, "/"))
+        except Exception:
+            logger.exception("Uploading image derivatives failed for %s", stage_path)
+        finally:
+            for path in [stage_path, *derivative_keys(stage_path)]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def backfill_derivatives(self) -> int:
+        # Originales con derivadas faltantes o que aun son la copia del original (mismo tamaño)
+        sizes = dict(self._list_objects())
+        widths = tuple(DERIVATIVE_WIDTHS.values())
+        done = 0
+        for key, size in sizes.items():
+            if not ORIGINAL_NAME.match(key):
+                continue
+            pending = {d for d in derivative_keys(key) if sizes.get(d) in (None, size)}
+            if not pending:
+                continue
+            stage_path = os.path.join(self.stage_dir, key)
+            os.makedirs(os.path.dirname(stage_path), exist_ok=True)
+            try:
+                self.client.download_file(self.bucket, self.object_key(key), stage_path)
+                for path in build_derivatives(stage_path, widths):
+                    derivative = os.path.relpath(path, self.stage_dir).replace(os.sep, "/")
+                    if derivative in pending:
+                        self.upload(path, derivative)
+                done += 1
+            except Exception as e:
+                logger.warning("Backfilling derivatives failed for %s: %s", key, e)
+            finally:
+                for path in [stage_path, *derivative_keys(stage_path)]:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        return done
+
+    def delete(self, key: str) -> None:
+        self.client.delete_objects(
+            Bucket=self.bucket,
+            Delete={"Objects": [{"Key": self.object_key(k)} for k in [key, *derivative_keys(key)]], "Quiet": True},
+        )
+
+
+_storage: LocalStorage | S3Storage | None = None
+
+
+def get_storage() -> LocalStorage | S3Storage:
+    # Se crea al primer uso: boto3 solo hace falta con MEDIA_STORAGE=s3
+    global _storage
+    if _storage is None:
+        if settings.MEDIA_STORAGE == "s3":
+            if not settings.MEDIA_S3_BUCKET:
+                raise RuntimeError("MEDIA_STORAGE=s3 requires MEDIA_S3_BUCKET")
+            _storage = S3Storage(
+                settings.MEDIA_S3_BUCKET,
+                prefix=settings.MEDIA_S3_PREFIX,
+                endpoint_url=settings.MEDIA_S3_ENDPOINT_URL,
+                region=settings.MEDIA_S3_REGION,
+            )
+        else:
+            _storage = LocalStorage(settings.MEDIA_DIR)
+    return _storage
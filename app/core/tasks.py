@@ -0,0 +1,72 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Corre `fn()` cada `interval_seconds` en un hilo daemon.
+
+    `wake()` adelanta la siguiente ejecucion (p. ej. cuando hay trabajo nuevo).
+    """
+
+    def __init__(self, name: str, interval_seconds: float, fn):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+        self.runs = 0
+        self.failures = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval_seconds <= 0:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def run_once(self) -> None:
+        try:
+            self.fn()
+            self.runs += 1
+        except Exception:
+            self.failures += 1
+            logger.exception("Periodic task %s failed", self.name)
+
+    def _loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            self.run_once()
+
+
+_tasks: list[PeriodicTask] = []
+
+
+def register_task(task: PeriodicTask) -> PeriodicTask:
+    _tasks.append(task)
+    return task
+
+
+def start_tasks() -> None:
+    for task in _tasks:
+        task.start()
+
+
+def stop_tasks() -> None:
+    for task in _tasks:
+        task.stop()
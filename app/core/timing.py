@@ -0,0 +1,188 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+# Una linea JSON por request; el handler y el nivel los configura app.main
+request_logger = logging.getLogger("app.requests")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries: int):
+    """Maximo de consultas SQL por request para el endpoint decorado.
+
+    Solo se revisa con QUERY_BUDGET_MODE=warn (log) o raise (excepcion, para tests/staging).
+    """
+
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+
+    return decorator
+
+
+class RequestStats:
+    """Tiempos del request en curso: BD (eventos del engine), render JSON y el resto (app)."""
+
+    def __init__(self, record_statements: bool = False):
+        self.started_at = time.perf_counter()
+        self.db_time = 0.0
+        self.db_count = 0
+        self.render_time = 0.0
+        # (sql, parametros) de cada consulta; solo con el detector activo
+        self.statements: list[tuple[str, str]] | None = [] if record_statements else None
+
+    def repeated_statements(self, threshold: int) -> dict[str, int]:
+        # Misma sentencia con parametros distintos >= threshold veces: probable N+1
+        params_by_sql = defaultdict(set)
+        for sql, params in self.statements or ():
+            params_by_sql[sql].add(params)
+        return {sql: len(params) for sql, params in params_by_sql.items() if len(params) >= threshold}
+
+    def budget_problems(self, budget: int | None) -> list[str]:
+        problems = []
+        if budget is not None and self.db_count > budget:
+            problems.append(f"{self.db_count} queries (budget {budget})")
+        for sql, count in self.repeated_statements(settings.QUERY_REPEAT_THRESHOLD).items():
+            problems.append(f"possible N+1: {count}x {' '.join(sql.split())[:200]}")
+        return problems
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def phases(self) -> dict:
+        total = self.elapsed()
+        return {
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(self.db_time * 1000, 2),
+            "db_queries": self.db_count,
+            "render_ms": round(self.render_time * 1000, 2),
+            "app_ms": round(max(total - self.db_time - self.render_time, 0.0) * 1000, 2),
+        }
+
+
+# El threadpool de AnyIO copia el contexto: los handlers sync ven el mismo objeto
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_request.get() is not None:
+        context._timing_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started_at = getattr(context, "_timing_started_at", None)
+    if stats is None or started_at is None:
+        return
+    stats.db_time += time.perf_counter() - started_at
+    stats.db_count += 1
+    if stats.statements is not None:
+        stats.statements.append((statement, repr(parameters)))
+
+
+@contextmanager
+def count_queries():
+    # Para tests: with count_queries() as stats: ...; assert stats.db_count <= n
+    stats = RequestStats(record_statements=True)
+    token = current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        current_request.reset(token)
+
+
+# Mismo formato que JSONResponse (UTF-8, compacto); claves no str como en json.dumps
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class TimedJSONResponse(JSONResponse):
+    # default_response_class de la app: serializa con orjson y mide el tiempo de render
+    def render(self, content) -> bytes:
+        stats = current_request.get()
+        if stats is None:
+            return orjson.dumps(content, option=ORJSON_OPTIONS)
+        started_at = time.perf_counter()
+        try:
+            return orjson.dumps(content, option=ORJSON_OPTIONS)
+        finally:
+            stats.render_time += time.perf_counter() - started_at
+
+
+def server_timing_header(phases: dict) -> str:
+    return ", ".join([
+        f'db;dur={phases["db_ms"]};desc="{phases["db_queries"]} queries"',
+        f'render;dur={phases["render_ms"]}',
+        f'app;dur={phases["app_ms"]}',
+        f'total;dur={phases["total_ms"]}',
+    ])
+
+
+def check_query_budget(scope, stats: RequestStats) -> None:
+    # scope["endpoint"] lo deja el router de Starlette al resolver la ruta
+    if settings.QUERY_BUDGET_MODE == "off":
+        return
+    budget = getattr(scope.get("endpoint"), "__query_budget__", None)
+    problems = stats.budget_problems(budget)
+    if not problems:
+        return
+    message = f"{scope['method']} {scope['path']}: " + "; ".join(problems)
+    if settings.QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning("Query budget: %s", message)
+
+
+class ServerTimingMiddleware:
+    """ASGI puro (sin BaseHTTPMiddleware): agrega Server-Timing y una linea de log JSON por request.
+
+    Con QUERY_BUDGET_MODE != off tambien revisa @query_budget y consultas repetidas (N+1).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(record_statements=settings.QUERY_BUDGET_MODE != "off")
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                # El handler ya termino: en modo raise todavia se puede fallar el request
+                check_query_budget(scope, stats)
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing_header(stats.phases()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            request_logger.info(json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                **stats.phases(),
+            }))
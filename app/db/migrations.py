@@ -0,0 +1,266 @@
+"""Migraciones versionadas del esquema.
+
+Cada migracion es idempotente (revisa con el inspector antes de alterar), asi que una
+base creada con el esquema viejo de create_all + ensure_* converge sin pasos manuales.
+La version aplicada queda en schema_migrations: un arranque normal solo hace un SELECT.
+
+    python -m app.db.migrations            # aplica lo pendiente
+    python -m app.db.migrations current    # muestra la version
+"""
+import logging
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, MetaData, String, TIMESTAMP, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import NoSuchTableError, OperationalError, ProgrammingError
+
+from app.core.config import settings
+from app.core.email import PASSWORD_RESET_SUBJECT
+from app.core.search import search_column_value, search_gram_rows
+from app.core.storage import media_key
+from app.models import EmailOutbox, Event, PasswordResetCode, Profile, ProfileGallery, ProfileSearchGram, User
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_LOCK_NAME = "quetzart_schema_migrations"
+SCHEMA_LOCK_TIMEOUT_SECONDS = 300
+
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(120), nullable=False),
+    Column("applied_at", TIMESTAMP, server_default=func.current_timestamp()),
+)
+
+
+def _indexes(conn: Connection, table: str) -> set[str]:
+    return {index["name"] for index in inspect(conn).get_indexes(table)}
+
+
+def initial_schema(conn: Connection):
+    # Tablas originales del MVP; las posteriores se crean en su propia migracion
+    tables = [User.__table__, Profile.__table__, ProfileGallery.__table__, Event.__table__, PasswordResetCode.__table__]
+    User.metadata.create_all(conn, tables=tables)
+
+
+def profile_gallery_columns(conn: Connection):
+    existing = {column["name"] for column in inspect(conn).get_columns("profile_gallery")}
+    missing_columns = {
+        "title": "VARCHAR(160) NULL",
+        "size": "VARCHAR(80) NULL",
+        "price": "DECIMAL(10, 2) NULL",
+        "description": "TEXT NULL",
+        "updated_at": "TIMESTAMP NULL",
+    }
+    for name, definition in missing_columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE profile_gallery ADD COLUMN {name} {definition}"))
+
+
+def user_role_admin(conn: Connection):
+    # Solo MySQL tiene ENUM nativo; y solo si al tipo le falta 'admin'
+    if conn.dialect.name != "mysql":
+        return
+    role = next(column for column in inspect(conn).get_columns("users") if column["name"] == "role")
+    if "admin" not in getattr(role["type"], "enums", ()):
+        conn.execute(text("ALTER TABLE users MODIFY role ENUM('artist', 'establishment', 'admin') NOT NULL"))
+
+
+def profile_search_columns(conn: Connection):
+    existing = {column["name"] for column in inspect(conn).get_columns("profiles")}
+    indexes = _indexes(conn, "profiles")
+    for name in ("search_name", "search_style"):
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE profiles ADD COLUMN {name} VARCHAR(255) NULL"))
+        if f"ix_profiles_{name}" not in indexes:
+            conn.execute(text(f"CREATE INDEX ix_profiles_{name} ON profiles ({name})"))
+
+    # Backfill en Python para usar exactamente normalize_search_text
+    rows = conn.execute(text(
+        "SELECT user_id, display_name, artistic_style FROM profiles "
+        "WHERE search_name IS NULL AND display_name IS NOT NULL AND display_name <> ''"
+    )).all()
+    for row in rows:
+        conn.execute(
+            text("UPDATE profiles SET search_name = :name, search_style = :style WHERE user_id = :user_id"),
+            {
+                "name": search_column_value(row.display_name),
+                "style": search_column_value(row.artistic_style),
+                "user_id": row.user_id,
+            },
+        )
+
+
+def events_starts_at_index(conn: Connection):
+    # Keyset de /public/events: ORDER BY starts_at, id
+    if "ix_events_starts_at" not in _indexes(conn, "events"):
+        conn.execute(text("CREATE INDEX ix_events_starts_at ON events (starts_at)"))
+
+
+def password_reset_indexes(conn: Connection):
+    existing = _indexes(conn, "password_reset_codes")
+    indexes = {
+        "ix_password_reset_codes_user_code": "user_id, code_hash",
+        "ix_password_reset_codes_expires_at": "expires_at",
+    }
+    for name, columns in indexes.items():
+        if name not in existing:
+            conn.execute(text(f"CREATE INDEX {name} ON password_reset_codes ({columns})"))
+
+
+def email_outbox_table(conn: Connection):
+    EmailOutbox.__table__.create(conn, checkfirst=True)
+
+
+def media_relative_keys(conn: Connection):
+    # Antes se guardaba la URL completa (PUBLIC_MEDIA_BASE/<nombre>); ahora solo la clave del storage
+    columns = (("profiles", "user_id", "profile_image_url"), ("profile_gallery", "id", "image_url"), ("events", "id", "image_url"))
+    for table, pk, column in columns:
+        rows = conn.execute(text(
+            f"SELECT {pk}, {column} FROM {table} WHERE {column} LIKE '%/media/%' OR {column} LIKE 'media/%'"
+        )).all()
+        updates = [{"pk": row[0], "key": media_key(row[1])} for row in rows]
+        if updates:
+            conn.execute(text(f"UPDATE {table} SET {column} = :key WHERE {pk} = :pk"), updates)
+
+
+def password_reset_attempts(conn: Connection):
+    existing = {column["name"] for column in inspect(conn).get_columns("password_reset_codes")}
+    if "failed_attempts" not in existing:
+        conn.execute(text("ALTER TABLE password_reset_codes ADD COLUMN failed_attempts INTEGER NOT NULL DEFAULT 0"))
+
+
+def drop_profile_search_indexes(conn: Connection):
+    # Los indices de search_name/search_style no sirven para LIKE '%term%' y solo costaban en
+    # cada escritura. (Esta version tambien creaba profile_search_tokens; la 12 la quita.)
+    indexes = _indexes(conn, "profiles")
+    for name in ("ix_profiles_search_name", "ix_profiles_search_style"):
+        if name in indexes:
+            conn.execute(text(f"DROP INDEX {name} ON profiles" if conn.dialect.name == "mysql" else f"DROP INDEX {name}"))
+
+
+def email_outbox_expiry(conn: Connection):
+    existing = {column["name"] for column in inspect(conn).get_columns("email_outbox")}
+    if "expires_at" not in existing:
+        conn.execute(text("ALTER TABLE email_outbox ADD COLUMN expires_at DATETIME NULL"))
+
+    # Los fallidos conservaban el codigo de recuperacion en el cuerpo. Los pendientes de antes
+    # no tienen vencimiento: a lo mas 10 minutos desde ahora, como un codigo nuevo
+    conn.execute(text("UPDATE email_outbox SET body = '' WHERE status = 'failed'"))
+    conn.execute(
+        text(
+            "UPDATE email_outbox SET expires_at = :expires_at "
+            "WHERE status = 'pending' AND expires_at IS NULL AND subject = :subject"
+        ),
+        {"expires_at": datetime.utcnow() + timedelta(minutes=10), "subject": PASSWORD_RESET_SUBJECT},
+    )
+
+
+def profile_search_grams(conn: Connection):
+    # Busqueda por subcadena (como normalize_search_text) con indice de trigramas; reemplaza
+    # a profile_search_tokens, que solo encontraba prefijos de palabra
+    ProfileSearchGram.__table__.create(conn, checkfirst=True)
+    if not conn.execute(select(ProfileSearchGram.user_id).limit(1)).first():
+        rows = conn.execute(text("SELECT user_id, search_name, search_style FROM profiles")).all()
+        grams = [gram for row in rows for gram in search_gram_rows(*row)]
+        for start in range(0, len(grams), 5000):
+            conn.execute(ProfileSearchGram.__table__.insert(), grams[start:start + 5000])
+    conn.execute(text("DROP TABLE IF EXISTS profile_search_tokens"))
+
+
+# (version, funcion). Solo se agregan al final; nunca se renumeran.
+MIGRATIONS = [
+    (1, initial_schema),
+    (2, profile_gallery_columns),
+    (3, user_role_admin),
+    (4, profile_search_columns),
+    (5, events_starts_at_index),
+    (6, password_reset_indexes),
+    (7, email_outbox_table),
+    (8, media_relative_keys),
+    (9, password_reset_attempts),
+    (10, drop_profile_search_indexes),
+    (11, email_outbox_expiry),
+    (12, profile_search_grams),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine: Engine) -> int:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+    except (NoSuchTableError, OperationalError, ProgrammingError):
+        # Tabla schema_migrations aun no existe
+        return 0
+
+
+@contextmanager
+def schema_lock(engine: Engine):
+    # GET_LOCK es por conexion: mientras esta siga abierta ningun otro worker migra
+    if engine.dialect.name != "mysql":
+        yield
+        return
+
+    with engine.connect() as conn:
+        acquired = conn.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": SCHEMA_LOCK_NAME, "timeout": SCHEMA_LOCK_TIMEOUT_SECONDS},
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError("Timed out waiting for the schema migration lock")
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": SCHEMA_LOCK_NAME})
+
+
+def upgrade(engine: Engine) -> list[int]:
+    applied = []
+    with schema_lock(engine):
+        metadata.create_all(engine)
+        # Otro worker pudo migrar mientras esperabamos el lock
+        version = current_version(engine)
+        for number, migration in MIGRATIONS:
+            if number <= version:
+                continue
+            logger.info("Applying schema migration %s (%s)", number, migration.__name__)
+            # En MySQL el DDL hace commit implicito: cada paso es idempotente por si se corta a medias
+            with engine.begin() as conn:
+                migration(conn)
+                conn.execute(schema_migrations.insert().values(version=number, name=migration.__name__))
+            applied.append(number)
+    return applied
+
+
+def ensure_schema(engine: Engine) -> None:
+    # Arranque normal: un solo SELECT de la version
+    if current_version(engine) >= LATEST_VERSION:
+        return
+    if not settings.DB_MIGRATE_ON_STARTUP:
+        raise RuntimeError(
+            f"Database schema is behind (expected version {LATEST_VERSION}); run `python -m app.db.migrations`"
+        )
+    upgrade(engine)
+
+
+def main() -> None:
+    from app.db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "current":
+        print(f"{current_version(engine)} (latest {LATEST_VERSION})")
+    elif command == "upgrade":
+        applied = upgrade(engine)
+        print(f"applied: {applied}" if applied else "schema is up to date")
+    else:
+        sys.exit(f"unknown command: {command} (use upgrade or current)")
+
+
+if __name__ == "__main__":
+    main()
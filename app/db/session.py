@@ -1,9 +1,260 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import threading
+import time
+
+from sqlalchemy import Delete, Insert, Update, create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
 from app.core.config import settings
 
-engine = create_engine(settings.DB_URL, pool_pre_ping=True)
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.connects = 0
+        self.pre_ping_failures = 0
+        self.invalidations = 0
+
+    def record_checkout(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+                return
+            self.checkouts += 1
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            checkouts = self.checkouts or 1
+            return {
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / checkouts * 1000, 3),
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+                "checkout_timeouts": self.checkout_timeouts,
+                "connects": self.connects,
+                "pre_ping_failures": self.pre_ping_failures,
+                "invalidations": self.invalidations,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    # _do_get es donde un hilo espera por una conexion libre (hasta pool_timeout)
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record_checkout(time.perf_counter() - started_at, timed_out=True)
+            raise
+        pool_stats.record_checkout(time.perf_counter() - started_at)
+        return connection
+
+
+pool_stats = PoolStats()
+
+engine = create_engine(
+    settings.DB_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Replica de solo lectura (opcional) para /public
+replica_engine = create_engine(
+    settings.DB_REPLICA_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+) if settings.DB_REPLICA_URL else None
+
+
+class ReplicaHealth:
+    """Circuit breaker de la replica.
+
+    Un error de conexion la marca caida por DB_REPLICA_RETRY_SECONDS; mientras tanto las
+    lecturas van al primario. Al vencer, un solo hilo la prueba con SELECT 1 antes de volver.
+    """
+
+    def __init__(self, replica, retry_seconds: float):
+        self.replica = replica
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+        self._probe_lock = threading.Lock()
+        # Contadores y _down_until; aparte de _probe_lock porque mark_down() llega desde
+        # handle_error tambien durante la prueba (que tiene tomado _probe_lock)
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.fallbacks = 0
+        self.reads = 0
+
+    def mark_down(self) -> None:
+        with self._lock:
+            self._down_until = time.monotonic() + self.retry_seconds
+            self.failures += 1
+
+    def available(self) -> bool:
+        if self.replica is None:
+            return False
+        if self._down_until and not self._probe():
+            with self._lock:
+                self.fallbacks += 1
+            return False
+        with self._lock:
+            self.reads += 1
+        return True
+
+    def _probe(self) -> bool:
+        if time.monotonic() < self._down_until or not self._probe_lock.acquire(blocking=False):
+            return False
+        try:
+            with self.replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception:
+            return False
+        finally:
+            self._probe_lock.release()
+        with self._lock:
+            self._down_until = 0.0
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "configured": self.replica is not None,
+                "healthy": self.replica is not None and time.monotonic() >= self._down_until,
+                "reads": self.reads,
+                "fallbacks": self.fallbacks,
+                "failures": self.failures,
+            }
+
+
+replica_health = ReplicaHealth(replica_engine, settings.DB_REPLICA_RETRY_SECONDS)
+
+if replica_engine is not None:
+    @event.listens_for(replica_engine, "handle_error")
+    def _replica_error(context):
+        # Caida / no se pudo conectar (connection es None si fallo el connect)
+        if context.is_disconnect or context.connection is None:
+            replica_health.mark_down()
+
+
+class RoutingSession(Session):
+    """Lee de la replica hasta la primera escritura; desde ahi todo va al primario.
+
+    La eleccion se fija al primer uso de la sesion para no mezclar servidores dentro de
+    una misma lectura. SQL textual (text("UPDATE ...")) no se detecta: usar ORM/Core DML.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["wrote"] = True
+        if self.info.get("wrote"):
+            return engine
+
+        if "read_bind" not in self.info:
+            self.info["read_bind"] = replica_engine if replica_health.available() else engine
+        return self.info["read_bind"]
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    with pool_stats._lock:
+        pool_stats.connects += 1
+
+
+@event.listens_for(engine, "invalidate")
+def _count_invalidate(dbapi_connection, connection_record, exception):
+    with pool_stats._lock:
+        # El pre-ping fallido llega como DisconnectionError (InvalidatePoolError)
+        if isinstance(exception, exc.DisconnectionError):
+            pool_stats.pre_ping_failures += 1
+        else:
+            pool_stats.invalidations += 1
+
+
+def db_pool_stats() -> dict:
+    pool = engine.pool
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "timeout_seconds": settings.DB_POOL_TIMEOUT_SECONDS,
+        "recycle_seconds": settings.DB_POOL_RECYCLE_SECONDS,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+        **pool_stats.snapshot(),
+        "replica": {
+            **replica_health.stats(),
+            **({
+                "checked_out": replica_engine.pool.checkedout(),
+                "overflow": replica_engine.pool.overflow(),
+            } if replica_engine is not None else {}),
+        },
+    }
+
+# Driver async equivalente para DB_URL (si no se da DB_ASYNC_URL)
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+_async_engine: AsyncEngine | None = None
+_async_session_factory: async_sessionmaker | None = None
+
+
+def async_db_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.drivername not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {parsed.drivername}; set DB_ASYNC_URL")
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername]).render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    # Se crea al primer uso: aiomysql/aiosqlite solo hacen falta con DB_ASYNC_PUBLIC
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.DB_ASYNC_URL or async_db_url(settings.DB_URL),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return _async_engine
+
+
+def async_session_factory() -> async_sessionmaker:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
 class Base(DeclarativeBase):
     pass
@@ -1,14 +1,27 @@
+import time
+
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 
-from app.db.session import SessionLocal
+from app.db.session import ReadSessionLocal, SessionLocal, async_session_factory
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
-from app.models import User
+from app.models import User, Profile
 
 oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# token -> user_id (JWT ya verificado) y user_id -> columnas de User.
+# Las escrituras a User/Profile en este proceso invalidan la entrada al hacer commit; en
+# otros workers el dato puede quedar viejo a lo mucho AUTH_CACHE_TTL_SECONDS.
+token_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+USER_SNAPSHOT_COLUMNS = tuple(column.key for column in User.__table__.columns)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -16,14 +29,107 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2)) -> User:
+
+def get_read_db():
+    # Lecturas publicas: replica si esta configurada y sana; tras una escritura, primario
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    # Para handlers async (DB_ASYNC_PUBLIC): no ocupa un hilo del threadpool mientras espera a la BD
+    db: AsyncSession = async_session_factory()()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def _token_user_id(token: str) -> int:
+    user_id = token_cache.get(token)
+    if user_id is not MISSING:
+        return user_id
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
         user_id = int(payload.get("sub"))
-    except (JWTError, ValueError):
+    except (JWTError, TypeError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.get(User, user_id)
+    # Nunca mas alla del exp del token
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    if payload.get("exp"):
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, user_id, ttl_seconds=ttl)
+    return user_id
+
+
+def _load_user(db: Session, user_id: int) -> User | None:
+    snapshot = user_cache.get(user_id)
+    if snapshot is MISSING:
+        user = db.get(User, user_id)
+        if user:
+            user_cache.set(user_id, {key: getattr(user, key) for key in USER_SNAPSHOT_COLUMNS})
+        return user
+
+    # Instancia persistente en esta sesion sin SELECT; relaciones (profile, gallery) cargan normal
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_user(user_id: int | None) -> None:
+    if user_id is not None:
+        user_cache.delete(user_id)
+
+
+# Se invalida tras el commit, no en el flush: entre ambos otro request todavia lee la fila
+# vieja y la volveria a guardar en la cache
+def _invalidate_after_commit(target, user_id: int | None) -> None:
+    session = object_session(target)
+    if session is None:
+        invalidate_user(user_id)
+    elif user_id is not None:
+        session.info.setdefault("stale_user_ids", set()).add(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    _invalidate_after_commit(target, target.id)
+
+
+@event.listens_for(Profile, "after_insert")
+@event.listens_for(Profile, "after_update")
+@event.listens_for(Profile, "after_delete")
+def _invalidate_cached_profile_user(mapper, connection, target):
+    _invalidate_after_commit(target, target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop("stale_user_ids", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_users(session):
+    session.info.pop("stale_user_ids", None)
+
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2)) -> User:
+    user_id = _token_user_id(token)
+
+    user = _load_user(db, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
+
+def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    return user
@@ -1,20 +1,40 @@
+import logging
 import os
+import sys
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy import inspect, text
 
-from app.db.session import engine
-from app.models import Base
+from app.db.migrations import ensure_schema
+from app.db.session import dispose_async_engine, engine
 from app.core.config import settings
+from app.core.email import smtp_pool
+from app.core.images import shutdown_executor
+from app.core.limits import RequestSizeLimitMiddleware
+from app.core.media_sweep import media_sweep_task  # noqa: F401  (registra el barrido de huerfanos)
+from app.core.tasks import start_tasks, stop_tasks
+from app.core.timing import ServerTimingMiddleware, TimedJSONResponse, request_logger
 
 from app.routes.auth import router as auth_router
 from app.routes.events import router as events_router
+from app.routes.internal import router as internal_router
 from app.routes.profile import router as profile_router
 from app.routes.public import router as public_router
+from app.routes.public_async import router as public_async_router
+from app.routes.media import MediaFiles
 
-app = FastAPI(title="Quetzart API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_tasks()
+    yield
+    stop_tasks()
+    smtp_pool.close_all()
+    shutdown_executor()
+    await dispose_async_engine()
+
+
+app = FastAPI(title="Quetzart API", lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 # 👇 Orígenes permitidos
 origins = [
@@ -31,56 +51,43 @@ origins = [
     # "https://tusitio.com",
 ]
 
+# 413 antes de que el cuerpo completo se vuelque a disco/memoria (MAX_REQUEST_BODY_BYTES).
+# Se agrega antes que CORS para quedar por dentro: el 413 tambien lleva los headers CORS
+app.add_middleware(RequestSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,        # lista concreta, NO varios en un header
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# Create tables (para MVP)
-Base.metadata.create_all(bind=engine)
-
-def ensure_profile_gallery_columns():
-    inspector = inspect(engine)
-    if not inspector.has_table("profile_gallery"):
-        return
-
-    existing = {column["name"] for column in inspector.get_columns("profile_gallery")}
-    missing_columns = {
-        "title": "VARCHAR(160) NULL",
-        "size": "VARCHAR(80) NULL",
-        "price": "DECIMAL(10, 2) NULL",
-        "description": "TEXT NULL",
-        "updated_at": "TIMESTAMP NULL",
-    }
-
-    with engine.begin() as conn:
-        for name, definition in missing_columns.items():
-            if name not in existing:
-                conn.execute(text(f"ALTER TABLE profile_gallery ADD COLUMN {name} {definition}"))
-
-
-ensure_profile_gallery_columns()
-
-def ensure_user_role_admin():
-    inspector = inspect(engine)
-    if not inspector.has_table("users"):
-        return
-
-    with engine.begin() as conn:
-        conn.execute(text("ALTER TABLE users MODIFY role ENUM('artist', 'establishment', 'admin') NOT NULL"))
+# Log JSON por request. uvicorn solo configura sus propios loggers: sin handler ni nivel
+# propios, los INFO de app.* no salen
+if not request_logger.handlers:
+    request_log_handler = logging.StreamHandler(sys.stdout)
+    request_log_handler.setFormatter(logging.Formatter("%(message)s"))
+    request_logger.addHandler(request_log_handler)
+request_logger.setLevel(logging.INFO)
+request_logger.propagate = False
 
+# Server-Timing (db / render / app / total) y log JSON por request
+if settings.REQUEST_TIMING or settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(ServerTimingMiddleware)
 
-ensure_user_role_admin()
+# Esquema: un SELECT de la version; las migraciones pendientes corren con lock (ver app.db.migrations)
+ensure_schema(engine)
 
 # Media
 os.makedirs(settings.MEDIA_DIR, exist_ok=True)
-app.mount("/media", StaticFiles(directory=settings.MEDIA_DIR), name="media")
+if settings.MEDIA_STORAGE == "local":
+    app.mount("/media", MediaFiles(directory=settings.MEDIA_DIR), name="media")
 
 # Rutas
 app.include_router(auth_router)
 app.include_router(events_router)
 app.include_router(profile_router)
-app.include_router(public_router)
+app.include_router(public_async_router if settings.DB_ASYNC_PUBLIC else public_router)
+app.include_router(internal_router)
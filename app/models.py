@@ -1,6 +1,8 @@
-from sqlalchemy import Column, BigInteger, String, Text, DateTime, Enum, ForeignKey, TIMESTAMP, Numeric, func
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, Enum, ForeignKey, Index, TIMESTAMP, Numeric, delete, event, func, insert, inspect
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from app.db.session import Base
+from app.core.search import SEARCH_GRAM_LENGTH, search_column_value, search_gram_rows
 
 class User(Base):
     __tablename__ = "users"
@@ -18,11 +20,15 @@ class User(Base):
 
 class PasswordResetCode(Base):
     __tablename__ = "password_reset_codes"
+    __table_args__ = (
+        Index("ix_password_reset_codes_user_code", "user_id", "code_hash"),
+    )
     id = Column(BigInteger, primary_key=True, index=True)
     user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    code_hash = Column(String(255), nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    code_hash = Column(String(255), nullable=False)  # reset_code_digest(user_id, code)
+    expires_at = Column(DateTime, nullable=False, index=True)
     used_at = Column(DateTime, nullable=True)
+    failed_attempts = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
 
     user = relationship("User", back_populates="password_reset_codes")
@@ -45,10 +51,59 @@ class Profile(Base):
     colony = Column(String(180), nullable=True)
     municipality = Column(String(180), nullable=True)
 
+    # Copias normalizadas (minusculas, sin acentos): la busqueda es "term in search_name",
+    # igual que normalize_search_text. Los candidatos salen de profile_search_grams
+    search_name = Column(String(255), nullable=True)
+    search_style = Column(String(255), nullable=True)
+
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
     user = relationship("User", back_populates="profile")
 
+
+@event.listens_for(Profile, "before_insert")
+@event.listens_for(Profile, "before_update")
+def sync_profile_search_columns(mapper, connection, target):
+    target.search_name = search_column_value(target.display_name)
+    target.search_style = search_column_value(target.artistic_style)
+
+
+class ProfileSearchGram(Base):
+    """Trigramas de profiles.search_name (field="name") y search_style (field="style").
+
+    LIKE '%term%' sobre search_name no usa indices; los perfiles que tienen todos los
+    trigramas del termino salen de ix_profile_search_grams_gram y solo esos se comparan.
+    """
+
+    __tablename__ = "profile_search_grams"
+    __table_args__ = (
+        Index("ix_profile_search_grams_gram", "gram", "field"),
+    )
+    user_id = Column(BigInteger, ForeignKey("profiles.user_id", ondelete="CASCADE"), primary_key=True)
+    field = Column(String(8), primary_key=True)
+    # Comparacion binaria en MySQL: con una collation _ci "ß"/"ss" o "o"/"ø" chocarian en la PK
+    gram = Column(
+        String(SEARCH_GRAM_LENGTH).with_variant(mysql.VARCHAR(SEARCH_GRAM_LENGTH, collation="utf8mb4_bin"), "mysql"),
+        primary_key=True,
+    )
+
+
+@event.listens_for(Profile, "after_insert")
+@event.listens_for(Profile, "after_update")
+def sync_profile_search_grams(mapper, connection, target):
+    state = inspect(target)
+    if not (state.attrs.display_name.history.has_changes() or state.attrs.artistic_style.history.has_changes()):
+        return
+    connection.execute(delete(ProfileSearchGram).where(ProfileSearchGram.user_id == target.user_id))
+    rows = search_gram_rows(target.user_id, target.search_name, target.search_style)
+    if rows:
+        connection.execute(insert(ProfileSearchGram), rows)
+
+
+@event.listens_for(Profile, "after_delete")
+def delete_profile_search_grams(mapper, connection, target):
+    connection.execute(delete(ProfileSearchGram).where(ProfileSearchGram.user_id == target.user_id))
+
 class ProfileGallery(Base):
     __tablename__ = "profile_gallery"
     id = Column(BigInteger, primary_key=True, index=True)
@@ -70,7 +125,7 @@ class Event(Base):
     establishment_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String(160), nullable=False)
     description = Column(Text, nullable=True)
-    starts_at = Column(DateTime, nullable=False)
+    starts_at = Column(DateTime, nullable=False, index=True)
     ends_at = Column(DateTime, nullable=True)
     location = Column(String(180), nullable=True)
     image_url = Column(Text, nullable=True)
@@ -78,3 +133,21 @@ class Event(Base):
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
     establishment = relationship("User", back_populates="events")
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    id = Column(BigInteger, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(Enum("pending", "sent", "failed"), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=True)  # pasado esto ya no se envia (codigos de recuperacion)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
@@ -1,8 +1,13 @@
 from datetime import datetime, timedelta
 import secrets
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
 from app.deps import get_db
 from app.models import User, Profile, ProfileGallery, PasswordResetCode
 from app.schemas import (
@@ -15,9 +20,18 @@ from app.schemas import (
     PasswordResetConfirm,
     MessageOut,
 )
-from app.core.security import hash_password, verify_password, create_access_token
-from app.core.email import send_password_reset_code
-from app.routes.media import save_base64_image
+from app.core.security import (
+    PasswordQueueFull,
+    create_access_token,
+    hash_password_async,
+    reset_code_digest,
+    verify_and_update_password,
+)
+from app.core.config import settings
+from app.core.tasks import PeriodicTask, register_task
+from app.core.email import enqueue_password_reset_code, outbox_task
+from app.core.cache import invalidate_home
+from app.routes.media import save_base64_image, save_images, save_upload_image
 
 import logging
 
@@ -29,32 +43,155 @@ def _utcnow() -> datetime:
     return datetime.utcnow()
 
 
+# bcrypt corre en app.core.security.password_hasher (pool propio); los handlers que lo
+# usan son async y mandan el trabajo de BD al threadpool con run_in_threadpool.
+def _password_busy() -> HTTPException:
+    return HTTPException(503, "Servidor ocupado, intenta de nuevo", headers={"Retry-After": "1"})
+
+
+async def _hash_password(password: str) -> str:
+    try:
+        return await hash_password_async(password)
+    except PasswordQueueFull:
+        raise _password_busy()
+
+
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+async def _ensure_email_available(db: Session, email: str) -> None:
+    if await run_in_threadpool(_get_user_by_email, db, email):
+        raise HTTPException(409, "Email already registered")
+
+
 def _find_valid_reset_code(db: Session, user_id: int, code: str) -> PasswordResetCode | None:
-    candidates = (
+    # Una sola consulta por indice (user_id, code_hash); code_hash es un HMAC del codigo
+    return (
         db.query(PasswordResetCode)
         .filter(
             PasswordResetCode.user_id == user_id,
+            PasswordResetCode.code_hash == reset_code_digest(user_id, code),
             PasswordResetCode.used_at.is_(None),
             PasswordResetCode.expires_at > _utcnow(),
+            PasswordResetCode.failed_attempts < settings.PASSWORD_RESET_MAX_ATTEMPTS,
         )
-        .order_by(PasswordResetCode.created_at.desc())
-        .all()
+        .first()
+    )
+
+
+def _record_failed_reset_attempt(db: Session, user_id: int) -> None:
+    # El codigo es de 6 digitos y validarlo es barato: tras N fallos se queman todos los
+    # codigos pendientes del usuario y hay que pedir uno nuevo
+    now = _utcnow()
+    pending = db.query(PasswordResetCode).filter(
+        PasswordResetCode.user_id == user_id,
+        PasswordResetCode.used_at.is_(None),
+        PasswordResetCode.expires_at > now,
     )
-    for item in candidates:
-        if verify_password(code, item.code_hash):
-            return item
-    return None
+    pending.update(
+        {PasswordResetCode.failed_attempts: PasswordResetCode.failed_attempts + 1},
+        synchronize_session=False,
+    )
+    pending.filter(PasswordResetCode.failed_attempts >= settings.PASSWORD_RESET_MAX_ATTEMPTS).update(
+        {PasswordResetCode.used_at: now},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def purge_password_reset_codes(db: Session) -> int:
+    deleted = (
+        db.query(PasswordResetCode)
+        .filter(or_(
+            PasswordResetCode.expires_at <= _utcnow(),
+            PasswordResetCode.used_at.is_not(None),
+        ))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def _purge_password_reset_codes_job() -> None:
+    db = SessionLocal()
+    try:
+        deleted = purge_password_reset_codes(db)
+        if deleted:
+            logger.info("Purged %s password reset codes", deleted)
+    finally:
+        db.close()
+
+
+register_task(PeriodicTask(
+    "password-reset-purge",
+    settings.PASSWORD_RESET_PURGE_INTERVAL_SECONDS,
+    _purge_password_reset_codes_job,
+))
 
 @router.post("/register-artist", response_model=TokenOut)
-def register_artist(payload: RegisterArtist, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == payload.email).first():
-        raise HTTPException(409, "Email already registered")
-    user = User(role="artist", email=payload.email, password_hash=hash_password(payload.password))
+async def register_artist(payload: RegisterArtist, db: Session = Depends(get_db)):
+    await _ensure_email_available(db, payload.email)
+    password_hash = await _hash_password(payload.password)
+    return await run_in_threadpool(
+        _create_artist,
+        db,
+        payload,
+        password_hash,
+        lambda: save_base64_image(payload.profile_image_base64) if payload.profile_image_base64 else None,
+        lambda: save_images(save_base64_image, payload.gallery_base64),
+    )
+
+
+@router.post("/register-artist/upload", response_model=TokenOut)
+async def register_artist_upload(
+    email: str = Form(),
+    password: str = Form(),
+    display_name: str = Form(),
+    artistic_style: str = Form(),
+    bio: str = Form(),
+    profile_image: UploadFile | None = File(default=None),
+    gallery: list[UploadFile] = File(default=[]),
+    db: Session = Depends(get_db),
+):
+    try:
+        payload = RegisterArtist(
+            email=email,
+            password=password,
+            display_name=display_name,
+            artistic_style=artistic_style,
+            bio=bio,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    await _ensure_email_available(db, payload.email)
+    password_hash = await _hash_password(payload.password)
+    return await run_in_threadpool(
+        _create_artist,
+        db,
+        payload,
+        password_hash,
+        lambda: save_upload_image(profile_image) if profile_image else None,
+        lambda: save_images(save_upload_image, gallery),
+    )
+
+
+def _create_artist(
+    db: Session,
+    payload: RegisterArtist,
+    password_hash: str,
+    save_profile_image,
+    save_gallery,
+) -> TokenOut:
+    # Imagenes antes de abrir la transaccion: la escritura a disco no la deja abierta
+    profile_image_url = save_profile_image()
+    gallery_urls = save_gallery()
+
+    user = User(role="artist", email=payload.email, password_hash=password_hash)
     db.add(user)
     db.flush()  # to get user.id
 
-    profile_image_url = save_base64_image(payload.profile_image_base64) if payload.profile_image_base64 else None
-
     profile = Profile(
         user_id=user.id,
         display_name=payload.display_name,
@@ -63,22 +200,26 @@ def register_artist(payload: RegisterArtist, db: Session = Depends(get_db)):
         artistic_style=payload.artistic_style
     )
     db.add(profile)
+    db.flush()
 
-    for img in payload.gallery_base64:
-        url = save_base64_image(img)
-        db.add(ProfileGallery(user_id=user.id, image_url=url))
+    if gallery_urls:
+        db.execute(insert(ProfileGallery), [{"user_id": user.id, "image_url": url} for url in gallery_urls])
 
     db.commit()
+    invalidate_home()
 
     token = create_access_token(sub=str(user.id), role=user.role)
     return TokenOut(access_token=token)
 
 @router.post("/register-establishment", response_model=TokenOut)
-def register_est(payload: RegisterEstablishment, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == payload.email).first():
-        raise HTTPException(409, "Email already registered")
+async def register_est(payload: RegisterEstablishment, db: Session = Depends(get_db)):
+    await _ensure_email_available(db, payload.email)
+    password_hash = await _hash_password(payload.password)
+    return await run_in_threadpool(_create_establishment, db, payload, password_hash)
 
-    user = User(role="establishment", email=payload.email, password_hash=hash_password(payload.password))
+
+def _create_establishment(db: Session, payload: RegisterEstablishment, password_hash: str) -> TokenOut:
+    user = User(role="establishment", email=payload.email, password_hash=password_hash)
     db.add(user)
     db.flush()
 
@@ -97,73 +238,85 @@ def register_est(payload: RegisterEstablishment, db: Session = Depends(get_db)):
     )
     db.add(profile)
     db.commit()
+    invalidate_home()
 
     token = create_access_token(sub=str(user.id), role=user.role)
     return TokenOut(access_token=token)
 
 @router.post("/login", response_model=TokenOut)
-def login(payload: LoginIn, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+async def login(payload: LoginIn, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_get_user_by_email, db, payload.email)
+    if not user:
         raise HTTPException(401, "Invalid credentials")
 
+    try:
+        valid, new_hash = await verify_and_update_password(payload.password, user.password_hash)
+    except PasswordQueueFull:
+        raise _password_busy()
+    if not valid:
+        raise HTTPException(401, "Invalid credentials")
+
+    # Antes del commit: despues, leer user.id/role recarga la fila con un SELECT en el event loop
     token = create_access_token(sub=str(user.id), role=user.role)
+
+    if new_hash:
+        # Rehash transparente cuando cambia BCRYPT_ROUNDS
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
+
     return TokenOut(access_token=token)
 
 
 @router.post("/password-reset/request", response_model=MessageOut)
 def request_password_reset(payload: PasswordResetRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = _get_user_by_email(db, payload.email)
     generic_message = "Si el correo existe, enviaremos un codigo de recuperacion."
 
     if not user:
         return MessageOut(message=generic_message)
 
     code = f"{secrets.randbelow(1_000_000):06d}"
+    expires_at = _utcnow() + timedelta(minutes=10)
     reset_code = PasswordResetCode(
         user_id=user.id,
-        code_hash=hash_password(code),
-        expires_at=_utcnow() + timedelta(minutes=10),
+        code_hash=reset_code_digest(user.id, code),
+        expires_at=expires_at,
     )
     db.add(reset_code)
+    # El correo sale por el outbox (hilo de fondo con reintentos); no esperamos al SMTP.
+    # Vence junto con el codigo: un reintento tardio no manda un codigo que ya no sirve
+    enqueue_password_reset_code(db, user.email, code, expires_at)
     db.commit()
-   
-
-    try:
-        send_password_reset_code(user.email, code)
-    except Exception as e:
-        logger.exception("Password reset email failed")
-        db.delete(reset_code)
-        db.commit()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error enviando correo: {str(e)}"
-        )
+    outbox_task.wake()
 
     return MessageOut(message=generic_message)
 
 
 @router.post("/password-reset/verify", response_model=MessageOut)
 def verify_password_reset_code(payload: PasswordResetVerify, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not _find_valid_reset_code(db, user.id, payload.code):
+    user = _get_user_by_email(db, payload.email)
+    if not user:
+        raise HTTPException(400, "Codigo invalido o expirado")
+    if not _find_valid_reset_code(db, user.id, payload.code):
+        _record_failed_reset_attempt(db, user.id)
         raise HTTPException(400, "Codigo invalido o expirado")
 
     return MessageOut(message="Codigo valido.")
 
 
 @router.post("/password-reset/confirm", response_model=MessageOut)
-def confirm_password_reset(payload: PasswordResetConfirm, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+async def confirm_password_reset(payload: PasswordResetConfirm, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_get_user_by_email, db, payload.email)
     if not user:
         raise HTTPException(400, "Codigo invalido o expirado")
 
-    reset_code = _find_valid_reset_code(db, user.id, payload.code)
+    reset_code = await run_in_threadpool(_find_valid_reset_code, db, user.id, payload.code)
     if not reset_code:
+        await run_in_threadpool(_record_failed_reset_attempt, db, user.id)
         raise HTTPException(400, "Codigo invalido o expirado")
 
-    user.password_hash = hash_password(payload.new_password)
+    user.password_hash = await _hash_password(payload.new_password)
     reset_code.used_at = _utcnow()
-    db.commit()
+    await run_in_threadpool(db.commit)
 
     return MessageOut(message="Contrasena actualizada.")
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy.orm import Session, joinedload
 
 from app.deps import get_db, get_current_user
+from app.core.cache import invalidate_home
+from app.core.timing import query_budget
 from app.models import Event, Profile, User
-from app.routes.media import public_media_url, save_base64_image
+from app.core.storage import media_key
+from app.routes.media import public_media_url, save_base64_image, save_upload_image
 from app.schemas import EventCreate, EventOut, EventUpdate
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+# serialize_event lee establishment.profile: se trae en el mismo SELECT
+EVENT_LOAD_OPTIONS = (joinedload(Event.establishment).joinedload(User.profile),)
+
 
 def serialize_event(event: Event) -> EventOut:
     profile = event.establishment.profile if event.establishment else None
@@ -28,7 +36,8 @@ def serialize_event(event: Event) -> EventOut:
 def event_image_url(image_base64: str | None, image_url: str | None) -> str | None:
     if image_base64:
         return save_base64_image(image_base64)
-    return image_url
+    # Una URL de nuestro propio media se guarda como clave
+    return media_key(image_url) or image_url
 
 
 @router.post("", response_model=EventOut)
@@ -49,13 +58,45 @@ def create_event(
         location=payload.location,
         image_url=event_image_url(payload.image_base64, payload.image_url),
     )
+    return _insert_event(db, row)
+
+
+@router.post("/upload", response_model=EventOut)
+def upload_event(
+    title: str = Form(min_length=2, max_length=160),
+    starts_at: datetime = Form(),
+    description: str | None = Form(default=None, max_length=3000),
+    ends_at: datetime | None = Form(default=None),
+    location: str | None = Form(default=None, max_length=180),
+    image: UploadFile | None = File(default=None),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    if user.role != "establishment":
+        raise HTTPException(403, "Only establishments can create events")
+
+    row = Event(
+        establishment_id=user.id,
+        title=title,
+        description=description,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        location=location,
+        image_url=save_upload_image(image) if image else None,
+    )
+    return _insert_event(db, row)
+
+
+def _insert_event(db: Session, row: Event) -> EventOut:
     db.add(row)
     db.commit()
+    invalidate_home()
     db.refresh(row)
     return serialize_event(row)
 
 
 @router.get("", response_model=list[EventOut])
+@query_budget(2)
 def list_my_events(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
@@ -65,6 +106,7 @@ def list_my_events(
 
     rows = (
         db.query(Event)
+        .options(*EVENT_LOAD_OPTIONS)
         .filter(Event.establishment_id == user.id)
         .order_by(Event.starts_at.asc())
         .all()
@@ -73,12 +115,18 @@ def list_my_events(
 
 
 @router.get("/{event_id}", response_model=EventOut)
+@query_budget(2)
 def get_my_event(
     event_id: int,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    row = db.query(Event).filter(Event.id == event_id, Event.establishment_id == user.id).first()
+    row = (
+        db.query(Event)
+        .options(*EVENT_LOAD_OPTIONS)
+        .filter(Event.id == event_id, Event.establishment_id == user.id)
+        .first()
+    )
     if not row:
         raise HTTPException(404, "Event not found")
     return serialize_event(row)
@@ -106,6 +154,7 @@ def update_event(
         setattr(row, key, value)
 
     db.commit()
+    invalidate_home()
     db.refresh(row)
     return serialize_event(row)
 
@@ -125,4 +174,5 @@ def delete_event(
 
     db.delete(row)
     db.commit()
+    invalidate_home()
     return {"ok": True}
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+
+from app.core.cache import home_cache
+from app.core.email import outbox_sender
+from app.core.security import password_hasher
+from app.db.session import db_pool_stats
+from app.deps import get_current_admin, token_cache, user_cache
+
+# Endpoints de monitoreo (solo admin)
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/cache-stats")
+def cache_stats():
+    return {
+        "home": home_cache.stats(),
+        "auth_tokens": token_cache.stats(),
+        "auth_users": user_cache.stats(),
+    }
+
+
+@router.get("/password-stats")
+def password_stats():
+    return password_hasher.stats()
+
+
+@router.get("/email-stats")
+def email_stats():
+    return outbox_sender.stats()
+
+
+@router.get("/db-pool")
+def db_pool():
+    return db_pool_stats()
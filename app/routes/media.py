@@ -1,36 +1,230 @@
-import os, base64, uuid
-from fastapi import APIRouter
+import os, base64, binascii, hashlib, mimetypes, re, stat, uuid
+from concurrent.futures import ThreadPoolExecutor
+import anyio
+from fastapi import APIRouter, HTTPException, UploadFile
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
 from app.core.config import settings
+from app.core.images import DERIVATIVE_WIDTHS, derivative_name
+from app.core.storage import CONTENT_ADDRESSED_NAME, FALLBACK_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL, get_storage, media_key
 
 router = APIRouter(prefix="/media", tags=["media"])
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_IMAGE_TYPES = {
+    "image/jpeg": "jpeg",
+    "image/jpg": "jpeg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/heic": "heic",
+}
+EXTENSION_ALIASES = {"jpg": "jpeg"}
+# Extensiones con las que puede estar guardado un original (las claves antiguas pueden ser .jpg)
+ORIGINAL_EXTENSIONS = tuple(dict.fromkeys([*UPLOAD_IMAGE_TYPES.values(), *EXTENSION_ALIASES]))
+
+DERIVATIVE_NAME = re.compile(r"^(?P<stem>.+)_w\d+\.webp$")
+
+# Variantes precomprimidas junto al archivo (<nombre>.br / <nombre>.gz), en orden de preferencia.
+# Solo se buscan para tipos de texto: JPEG/PNG/WebP ya vienen comprimidos.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_TYPES = {"image/svg+xml", "application/json", "application/javascript", "text/css", "text/plain"}
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(413, f"Image exceeds {settings.MEDIA_MAX_UPLOAD_BYTES} bytes")
+
+
+def content_addressed_name(digest: str, ext: str) -> str:
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def _tmp_path() -> str:
+    # Mismo filesystem que MEDIA_DIR para que os.replace sea atomico (con S3 es solo scratch)
+    tmp_dir = os.path.join(settings.MEDIA_DIR, ".tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return os.path.join(tmp_dir, f"{uuid.uuid4().hex}.part")
+
+
+def _commit_tmp(tmp_path: str, digest: str, ext: str) -> str:
+    # Devuelve la clave que se guarda en la BD. Si el contenido ya existe se reutiliza.
+    # Nunca se borra si la transaccion falla: otro request pudo reutilizar el mismo archivo.
+    # Los huerfanos los recoge app.core.media_sweep.
+    key = content_addressed_name(digest, EXTENSION_ALIASES.get(ext, ext))
+    get_storage().put(tmp_path, key)
+    return key
+
+
 def save_base64_image(data_url: str) -> str:
     # data:image/png;base64,....
-    header, b64 = data_url.split(",", 1)
-    ext = "jpg"
-    if "image/" in header:
-      ext = header.split("image/")[1].split(";")[0]
+    header, sep, b64 = data_url.partition(",")
+    if not sep:
+        raise HTTPException(422, "Invalid image data URL")
+    # La extension sale de la lista blanca, nunca del header (termina en la ruta del archivo)
+    media_type = header.removeprefix("data:").split(";")[0].strip().lower() or "image/jpeg"
+    ext = UPLOAD_IMAGE_TYPES.get(media_type)
+    if not ext:
+        raise HTTPException(415, "Unsupported image type")
+
+    if len(b64) * 3 // 4 > settings.MEDIA_MAX_UPLOAD_BYTES:
+        raise _too_large()
+
+    try:
+        data = base64.b64decode(b64)
+    except binascii.Error:
+        raise HTTPException(422, "Invalid image data URL")
+    tmp_path = _tmp_path()
+    with open(tmp_path, "wb") as f:
+      f.write(data)
+
+    return _commit_tmp(tmp_path, hashlib.sha256(data).hexdigest(), ext)
+
+
+def save_upload_image(upload: UploadFile) -> str:
+    # multipart/form-data: se copia a disco por bloques, sin cargar el archivo completo
+    ext = UPLOAD_IMAGE_TYPES.get((upload.content_type or "").lower())
+    if not ext:
+        raise HTTPException(415, "Unsupported image type")
+
+    tmp_path = _tmp_path()
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk := upload.file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > settings.MEDIA_MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                f.write(chunk)
+        if not written:
+            raise HTTPException(422, "Empty image")
+        key = _commit_tmp(tmp_path, digest.hexdigest(), ext)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return key
+
 
-    os.makedirs(settings.MEDIA_DIR, exist_ok=True)
-    name = f"{uuid.uuid4().hex}.{ext}"
-    path = os.path.join(settings.MEDIA_DIR, name)
+_save_executor = ThreadPoolExecutor(max_workers=settings.MEDIA_SAVE_WORKERS, thread_name_prefix="media-save")
 
-    with open(path, "wb") as f:
-      f.write(base64.b64decode(b64))
 
-    return f"{settings.PUBLIC_MEDIA_BASE}/{name}"
+def save_images(save, items: list) -> list[str]:
+    # Decodifica/escribe varias imagenes en paralelo (pool acotado); respeta el orden de items
+    if len(items) <= 1:
+        return [save(item) for item in items]
+
+    futures = [_save_executor.submit(save, item) for item in items]
+    urls, error = [], None
+    for future in futures:
+        # Se esperan todas antes de fallar: ninguna escritura sigue despues de la respuesta
+        try:
+            urls.append(future.result())
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return urls
+
+
+def accepted_encodings(header: str | None) -> set[str]:
+    encodings = set()
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(token.strip().lower())
+    return encodings
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles para MEDIA_DIR.
+
+    - Nombres por hash: Cache-Control immutable (nunca cambian de contenido).
+    - Tipos de texto: sirve <archivo>.br/.gz si existe y el cliente lo acepta.
+    - Derivada _wNNN.webp que aun no existe: responde con el original.
+    Range, HEAD, ETag/If-None-Match y http.response.pathsend los resuelve FileResponse.
+    """
+
+    async def get_response(self, path: str, scope):
+        if path.startswith("."):
+            raise StarletteHTTPException(status_code=404)
+
+        name = path.replace(os.sep, "/")
+        media_type = mimetypes.guess_type(name)[0]
+        compressible = media_type in COMPRESSIBLE_TYPES and scope["method"] in ("GET", "HEAD")
+
+        response = None
+        if compressible:
+            response = await self._precompressed_response(path, media_type, scope)
+        if response is None:
+            try:
+                response = await super().get_response(path, scope)
+            except StarletteHTTPException as e:
+                if e.status_code != 404 or not DERIVATIVE_NAME.match(name):
+                    raise
+                response = await self._original_response(name, scope)
+
+        if compressible:
+            response.headers["Vary"] = "Accept-Encoding"
+        if response.status_code in (200, 206, 304) and "Cache-Control" not in response.headers:
+            if CONTENT_ADDRESSED_NAME.match(name):
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    async def _precompressed_response(self, path: str, media_type: str, scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding"))
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                return self._file_response(full_path, stat_result, scope, media_type, {"Content-Encoding": encoding})
+        return None
+
+    async def _original_response(self, name: str, scope):
+        stem = DERIVATIVE_NAME.match(name).group("stem")
+        original = await anyio.to_thread.run_sync(self._find_original, stem)
+        if original is None:
+            raise StarletteHTTPException(status_code=404)
+        full_path, stat_result = original
+        return self._file_response(
+            full_path, stat_result, scope, None, {"Cache-Control": FALLBACK_CACHE_CONTROL},
+        )
+
+    def _find_original(self, stem: str):
+        # Un stat por extension conocida; nunca se lista el directorio (la raiz puede ser enorme)
+        for ext in ORIGINAL_EXTENSIONS:
+            full_path, stat_result = self.lookup_path(f"{stem}.{ext}")
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                return full_path, stat_result
+        return None
+
+    def _file_response(self, full_path, stat_result, scope, media_type, headers: dict):
+        response = FileResponse(full_path, stat_result=stat_result, media_type=media_type, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
 
 
 def public_media_url(url: str | None) -> str | None:
+    # La BD guarda claves del storage; las URLs externas se devuelven tal cual
     if not url:
         return None
 
-    marker = "/media/"
-    if marker in url:
-        name = url.rsplit(marker, 1)[1].lstrip("/")
-        return f"{settings.PUBLIC_MEDIA_BASE}/{name}"
-
-    if url.startswith("media/"):
-        return f"{settings.PUBLIC_MEDIA_BASE}/{url.split('/', 1)[1]}"
+    key = media_key(url)
+    if key:
+        return f"{settings.PUBLIC_MEDIA_BASE}/{key}"
 
     return url
+
+
+def public_media_variant_url(url: str | None, variant: str) -> str | None:
+    # Derivada WebP de ancho fijo (ver app.core.images); las URLs externas se devuelven tal cual
+    key = media_key(url)
+    if not key:
+        return public_media_url(url)
+    return f"{settings.PUBLIC_MEDIA_BASE}/{derivative_name(key, DERIVATIVE_WIDTHS[variant])}"
@@ -1,17 +1,22 @@
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from decimal import Decimal
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.deps import get_db, get_current_user
+from app.core.cache import invalidate_home
+from app.core.timing import query_budget
 from app.models import Profile, ProfileGallery
 from app.schemas import ArtworkCreate, ArtworkUpdate, GalleryItem, ProfileOut, ProfileUpdate
 from app.models import User
-from app.routes.media import save_base64_image, public_media_url
+from app.routes.media import save_base64_image, save_images, save_upload_image, public_media_url
 
 router = APIRouter(prefix="/profile", tags=["profile"])
 
 DEFAULT_ADMIN_PROFILE_IMAGE = "assets/avatar-placeholder.png"
 
 @router.get("/me", response_model=ProfileOut)
+@query_budget(3)
 def me(user: User = Depends(get_current_user)):
     p = user.profile
     if user.role == "admin":
@@ -115,6 +120,7 @@ def update_profile(
             p.category = payload.category
 
     db.commit()
+    invalidate_home()
     db.refresh(user)
 
     return me(user)
@@ -136,6 +142,19 @@ def set_profile_image(
     if not data_url:
         raise HTTPException(422, "profile_image_base64 required")
 
+    return _set_profile_image_url(db, user, lambda: save_base64_image(data_url))
+
+
+@router.post("/me/profile-image/upload")
+def upload_profile_image(
+    image: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    return _set_profile_image_url(db, user, lambda: save_upload_image(image))
+
+
+def _set_profile_image_url(db: Session, user: User, save_image):
     prof = db.query(Profile).filter(Profile.user_id == user.id).first()
     if not prof and user.role == "admin":
         prof = Profile(
@@ -150,9 +169,10 @@ def set_profile_image(
     if not prof:
         raise HTTPException(404, "Profile not found")
 
-    prof.profile_image_url = save_base64_image(data_url)
+    prof.profile_image_url = save_image()
 
     db.commit()
+    invalidate_home()
     db.refresh(prof)
 
     return {"ok": True, "profile_image_url": public_media_url(prof.profile_image_url)}
@@ -167,17 +187,31 @@ def add_gallery(
     if not isinstance(images, list) or not images:
         raise HTTPException(422, "gallery_base64 must be a non-empty list")
 
-    urls = []
-    for img in images:
-        url = save_base64_image(img)
-        db.add(ProfileGallery(user_id=user.id, image_url=url))
-        urls.append(public_media_url(url))
+    return _add_gallery_images(db, user, save_base64_image, images)
+
+
+@router.post("/me/gallery/upload")
+def upload_gallery(
+    images: list[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    if not images:
+        raise HTTPException(422, "images must be a non-empty list")
+
+    return _add_gallery_images(db, user, save_upload_image, images)
 
+
+def _add_gallery_images(db: Session, user: User, save, images: list):
+    image_urls = save_images(save, images)
+    db.execute(insert(ProfileGallery), [{"user_id": user.id, "image_url": url} for url in image_urls])
     db.commit()
-    return {"ok": True, "items": urls}
+    invalidate_home()
+    return {"ok": True, "items": [public_media_url(url) for url in image_urls]}
 
 
 @router.get("/me/artworks", response_model=list[GalleryItem])
+@query_budget(2)
 def list_artworks(
     user: User = Depends(get_current_user),
 ):
@@ -201,8 +235,36 @@ def create_artwork(
         price=payload.price,
         description=payload.description,
     )
+    return _insert_artwork(db, row)
+
+
+@router.post("/me/artworks/upload", response_model=GalleryItem)
+def upload_artwork(
+    image: UploadFile = File(...),
+    title: str = Form(min_length=2, max_length=160),
+    size: str | None = Form(default=None, max_length=80),
+    price: Decimal | None = Form(default=None, ge=0),
+    description: str | None = Form(default=None, max_length=3000),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    require_artist(user)
+
+    row = ProfileGallery(
+        user_id=user.id,
+        image_url=save_upload_image(image),
+        title=title,
+        size=size,
+        price=price,
+        description=description,
+    )
+    return _insert_artwork(db, row)
+
+
+def _insert_artwork(db: Session, row: ProfileGallery) -> GalleryItem:
     db.add(row)
     db.commit()
+    invalidate_home()
     db.refresh(row)
     return serialize_artwork(row)
 
@@ -232,6 +294,7 @@ def update_artwork(
         setattr(row, key, value)
 
     db.commit()
+    invalidate_home()
     db.refresh(row)
     return serialize_artwork(row)
 
@@ -254,6 +317,7 @@ def delete_artwork(
 
     db.delete(row)
     db.commit()
+    invalidate_home()
     return {"ok": True}
 
 
@@ -273,4 +337,5 @@ def delete_gallery_item(
 
     db.delete(row)
     db.commit()
+    invalidate_home()
     return {"ok": True}
@@ -1,66 +1,192 @@
-import unicodedata
-
-from fastapi import APIRouter, Depends, HTTPException, Query
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
-from app.deps import get_db
-from app.models import Event, User, Profile, ProfileGallery
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, func, or_, select, true
+from app.deps import get_read_db
+from app.models import Event, User, Profile, ProfileGallery, ProfileSearchGram
+from app.core.cache import MISSING, home_cache
 from app.core.config import settings
-from app.routes.media import public_media_url
+from app.core.sampling import RandomIdPool, order_by_ids
+from app.core.search import normalize_search_text, search_grams
+from app.core.timing import query_budget
+from app.routes.media import public_media_url, public_media_variant_url
+from app.schemas import (
+    HomeArtworkCard,
+    HomeOut,
+    PublicArtistCard,
+    PublicArtistOut,
+    PublicArtistsPage,
+    PublicArtworkCard,
+    PublicArtworksPage,
+    PublicEstablishmentCard,
+    PublicEstablishmentOut,
+    PublicEstablishmentsPage,
+    PublicEventCard,
+    PublicEventsPage,
+    PublicGalleryItem,
+)
 
 
 router = APIRouter(prefix="/public", tags=["public"])
 
-ACCENT_REPLACEMENTS = (
-    ("á", "a"), ("à", "a"), ("ä", "a"), ("â", "a"),
-    ("é", "e"), ("è", "e"), ("ë", "e"), ("ê", "e"),
-    ("í", "i"), ("ì", "i"), ("ï", "i"), ("î", "i"),
-    ("ó", "o"), ("ò", "o"), ("ö", "o"), ("ô", "o"),
-    ("ú", "u"), ("ù", "u"), ("ü", "u"), ("û", "u"),
-    ("ñ", "n"),
-)
 
+# search_field -> columnas normalizadas (ProfileSearchGram.field tiene los mismos nombres)
+SEARCH_COLUMNS = {"name": Profile.search_name, "style": Profile.search_style}
+
+
+def normalized_search_filter(search: str, fields: tuple[str, ...], wildcards: bool = False):
+    # "normalize_search_text(search) in search_*" (lo que hacia matches_normalized). Con 3+
+    # caracteres los candidatos salen del indice de trigramas y solo ellos pasan por el LIKE.
+    # wildcards=True: % y _ del termino son comodines de LIKE, como en /public/artworks
+    term = normalize_search_text(search)
+    if wildcards and ("%" in term or "_" in term):
+        return or_(*(SEARCH_COLUMNS[field].like(f"%{term}%") for field in fields))
+    match = or_(*(SEARCH_COLUMNS[field].contains(term, autoescape=True) for field in fields))
+    grams = search_grams(term)
+    if not grams:
+        return match
+    candidates = (
+        select(ProfileSearchGram.user_id)
+        .where(ProfileSearchGram.gram.in_(grams), ProfileSearchGram.field.in_(fields))
+        .group_by(ProfileSearchGram.user_id, ProfileSearchGram.field)
+        .having(func.count() == len(grams))
+    )
+    return and_(Profile.user_id.in_(candidates), match)
 
-def normalize_search_text(value: str) -> str:
-    value = value.strip().lower()
-    value = unicodedata.normalize("NFKD", value)
-    value = "".join(char for char in value if not unicodedata.combining(char))
-    for accented, plain in ACCENT_REPLACEMENTS:
-        value = value.replace(accented, plain)
-    return value
 
+def search_fields(search_field: str | None) -> tuple[str, ...]:
+    return (search_field,) if search_field in SEARCH_COLUMNS else tuple(SEARCH_COLUMNS)
 
-def matches_normalized(value: str | None, search: str) -> bool:
-    if not value:
-        return False
-    return normalize_search_text(search) in normalize_search_text(value)
 
+def paginate(page: int, size: int):
+    page = max(page, 1)
+    size = min(max(size, 1), 50)
+    return (page - 1) * size, size
 
-def normalized_column(column):
-    expr = func.lower(column)
-    for accented, plain in ACCENT_REPLACEMENTS:
-        expr = func.replace(expr, accented, plain)
-        expr = func.replace(expr, accented.upper(), plain)
-    return expr
 
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
-def normalized_like(column, search: str):
-    return normalized_column(column).like(f"%{normalize_search_text(search)}%")
 
+def decode_cursor(cursor: str, length: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        raise HTTPException(400, "Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise HTTPException(400, "Invalid cursor")
+    return values
 
-def paginate(page: int, size: int):
-    page = max(page, 1)
-    size = min(max(size, 1), 50)
-    return (page - 1) * size, size
 
-@router.get("/artists")
+def decode_id_cursor(cursor: str) -> int:
+    (last_id,) = decode_cursor(cursor, 1)
+    if not isinstance(last_id, int):
+        raise HTTPException(400, "Invalid cursor")
+    return last_id
+
+
+def decode_event_cursor(cursor: str) -> tuple[datetime, int]:
+    starts_at, last_id = decode_cursor(cursor, 2)
+    try:
+        starts_at = datetime.fromisoformat(starts_at)
+    except (TypeError, ValueError):
+        raise HTTPException(400, "Invalid cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(400, "Invalid cursor")
+    return starts_at, last_id
+
+
+# Pagina con OFFSET (page) o por keyset (cursor); q ya viene filtrado y ordenado.
+# Con cursor el COUNT se omite salvo que se pida include_total=true.
+def fetch_page(q, page: int, size: int, cursor: str | None, include_total: bool | None, cursor_key):
+    offset, limit = paginate(page, size)
+    if include_total is None:
+        include_total = cursor is None
+
+    total = q.order_by(None).count() if include_total else None
+    if cursor is None:
+        q = q.offset(offset)
+    rows = q.limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "page": page if cursor is None else None,
+        "size": limit,
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": encode_cursor(cursor_key(rows[-1])) if has_more else None,
+    }, rows
+
+# Filas -> modelos de respuesta (compartido por los listados y /home)
+def artist_card(r) -> PublicArtistCard:
+    return PublicArtistCard(
+        user_id=r.id,
+        display_name=r.display_name,
+        profile_image_url=public_media_url(r.profile_image_url),
+        profile_image_thumb_url=public_media_variant_url(r.profile_image_url, "thumb"),
+        artistic_style=r.artistic_style,
+    )
+
+
+def establishment_card(r) -> PublicEstablishmentCard:
+    return PublicEstablishmentCard(
+        user_id=r.id,
+        display_name=r.display_name,
+        profile_image_url=public_media_url(r.profile_image_url),
+        profile_image_thumb_url=public_media_variant_url(r.profile_image_url, "thumb"),
+        category=r.category,
+        municipality=r.municipality,
+    )
+
+
+def event_card(r) -> PublicEventCard:
+    return PublicEventCard(
+        id=r.id,
+        establishment_id=r.establishment_id,
+        establishment_name=r.establishment_name,
+        establishment_image_url=public_media_url(r.establishment_image_url),
+        establishment_image_thumb_url=public_media_variant_url(r.establishment_image_url, "thumb"),
+        title=r.title,
+        description=r.description,
+        starts_at=r.starts_at,
+        ends_at=r.ends_at,
+        location=r.location,
+        image_url=public_media_url(r.image_url),
+        image_thumb_url=public_media_variant_url(r.image_url, "card"),
+    )
+
+
+def artwork_fields(r) -> dict:
+    # price llega como Decimal: el modelo (float) lo convierte
+    return {
+        "gallery_id": r.id,
+        "image_url": public_media_url(r.image_url),
+        "image_thumb_url": public_media_variant_url(r.image_url, "card"),
+        "title": r.title,
+        "size": r.size,
+        "price": r.price,
+        "description": r.description,
+        "user_id": r.user_id,
+    }
+
+
+@router.get("/artists", response_model=PublicArtistsPage)
+@query_budget(2)
 def list_artists(
     search: str | None = Query(default=None),
     search_field: str | None = Query(default=None),
     page: int = 1,
     size: int = 20,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     offset, limit = paginate(page, size)
 
@@ -70,46 +196,24 @@ def list_artists(
         .filter(User.role == "artist")
     )
 
-    rows = q.all()
-
     if search:
-        if search_field == "name":
-            rows = [r for r in rows if matches_normalized(r.display_name, search)]
-        elif search_field == "style":
-            rows = [r for r in rows if matches_normalized(r.artistic_style, search)]
-        else:
-            rows = [
-                r for r in rows
-                if matches_normalized(r.display_name, search) or matches_normalized(r.artistic_style, search)
-            ]
+        q = q.filter(normalized_search_filter(search, search_fields(search_field)))
 
-    total = len(rows)
-    rows = rows[offset:offset + limit]
+    total = q.count()
+    rows = q.order_by(User.id).offset(offset).limit(limit).all()
 
-    return {
-        "page": page,
-        "size": limit,
-        "total": total,
-        "items": [
-            {
-                "user_id": r.id,
-                "display_name": r.display_name,
-                "profile_image_url": public_media_url(r.profile_image_url),
-                "artistic_style": r.artistic_style,
-            }
-            for r in rows
-        ],
-    }
+    return PublicArtistsPage(page=page, size=limit, total=total, items=[artist_card(r) for r in rows])
 
-@router.get("/establishments")
+@router.get("/establishments", response_model=PublicEstablishmentsPage)
+@query_budget(2)
 def list_establishments(
     search: str | None = Query(default=None),
     page: int = 1,
     size: int = 20,
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(default=None),
+    include_total: bool | None = Query(default=None),
+    db: Session = Depends(get_read_db),
 ):
-    offset, limit = paginate(page, size)
-
     q = (
         db.query(User.id, Profile.display_name, Profile.profile_image_url, Profile.category, Profile.municipality)
         .join(Profile, Profile.user_id == User.id)
@@ -124,35 +228,14 @@ def list_establishments(
             Profile.municipality.like(s),
         ))
 
-    total = q.count()
-    rows = q.offset(offset).limit(limit).all()
+    if cursor:
+        q = q.filter(User.id > decode_id_cursor(cursor))
+    meta, rows = fetch_page(q.order_by(User.id), page, size, cursor, include_total, lambda r: [r.id])
 
-    return {
-        "page": page,
-        "size": limit,
-        "total": total,
-        "items": [
-            {
-                "user_id": r.id,
-                "display_name": r.display_name,
-                "profile_image_url": public_media_url(r.profile_image_url),
-                "category": r.category,
-                "municipality": r.municipality,
-            }
-            for r in rows
-        ],
-    }
+    return PublicEstablishmentsPage(**meta, items=[establishment_card(r) for r in rows])
 
-@router.get("/artworks")
-def list_artworks(
-    search: str | None = Query(default=None),
-    search_field: str | None = Query(default=None),
-    page: int = 1,
-    size: int = 20,
-    db: Session = Depends(get_db),
-):
-    offset, limit = paginate(page, size)
 
+def artworks_query(db: Session, search: str | None = None, search_field: str | None = None):
     # obras = ProfileGallery (asumiendo que ahí guardas imágenes)
     q = (
         db.query(
@@ -170,49 +253,54 @@ def list_artworks(
     )
 
     if search:
-        s = f"%{search.strip()}%"
+        # Nombre normalizado (trigramas + search_name); el estilo es LIKE sobre el texto tal
+        # cual, como siempre en este listado. Primero los perfiles, luego sus obras por user_id
+        name_match = normalized_search_filter(search, ("name",), wildcards=True)
+        style_match = Profile.artistic_style.like(f"%{search.strip()}%")
         if search_field == "name":
-            q = q.filter(normalized_like(Profile.display_name, search))
+            match = name_match
         elif search_field == "style":
-            q = q.filter(Profile.artistic_style.like(s))
+            match = style_match
         else:
-            q = q.filter(or_(
-                normalized_like(Profile.display_name, search),
-                Profile.artistic_style.like(s),
-            ))
+            match = or_(name_match, style_match)
+        q = q.filter(ProfileGallery.user_id.in_(select(Profile.user_id).where(match)))
 
-    total = q.count()
-    rows = q.offset(offset).limit(limit).all()
+    return q
 
-    return {
-        "page": page,
-        "size": limit,
-        "total": total,
-        "items": [
-            {
-                "gallery_id": r.id,
-                "image_url": public_media_url(r.image_url),
-                "title": r.title,
-                "size": r.size,
-                "price": float(r.price) if r.price is not None else None,
-                "description": r.description,
-                "user_id": r.user_id,
-                "display_name": r.display_name,
-            }
-            for r in rows
-        ],
-    }
+
+@router.get("/artworks", response_model=PublicArtworksPage)
+@query_budget(2)
+def list_artworks(
+    search: str | None = Query(default=None),
+    search_field: str | None = Query(default=None),
+    page: int = 1,
+    size: int = 20,
+    cursor: str | None = Query(default=None),
+    include_total: bool | None = Query(default=None),
+    db: Session = Depends(get_read_db),
+):
+    q = artworks_query(db, search, search_field)
+
+    if cursor:
+        q = q.filter(ProfileGallery.id > decode_id_cursor(cursor))
+    meta, rows = fetch_page(q.order_by(ProfileGallery.id), page, size, cursor, include_total, lambda r: [r.id])
+
+    return PublicArtworksPage(
+        **meta,
+        items=[PublicArtworkCard(**artwork_fields(r), display_name=r.display_name) for r in rows],
+    )
 
 
-@router.get("/events")
+@router.get("/events", response_model=PublicEventsPage)
+@query_budget(2)
 def list_events(
     search: str | None = Query(default=None),
     page: int = 1,
     size: int = 20,
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(default=None),
+    include_total: bool | None = Query(default=None),
+    db: Session = Depends(get_read_db),
 ):
-    offset, limit = paginate(page, size)
-
     q = (
         db.query(
             Event.id,
@@ -241,60 +329,141 @@ def list_events(
             Profile.category.like(s),
         ))
 
-    total = q.count()
-    rows = q.order_by(Event.starts_at.asc()).offset(offset).limit(limit).all()
+    if cursor:
+        starts_at, last_id = decode_event_cursor(cursor)
+        q = q.filter(or_(
+            Event.starts_at > starts_at,
+            and_(Event.starts_at == starts_at, Event.id > last_id),
+        ))
+    meta, rows = fetch_page(
+        q.order_by(Event.starts_at.asc(), Event.id.asc()),
+        page,
+        size,
+        cursor,
+        include_total,
+        lambda r: [r.starts_at.isoformat(), r.id],
+    )
+
+    return PublicEventsPage(**meta, items=[event_card(r) for r in rows])
+
+# Pools de ids para /public/home: se recargan cada HOME_POOL_TTL_SECONDS leyendo solo
+# la PK, y en cada request se eligen ids al azar y se traen por PK (sin ORDER BY RAND()).
+def _artist_ids(db: Session):
+    q = db.query(User.id).join(Profile, Profile.user_id == User.id).filter(User.role == "artist")
+    return (r.id for r in q.yield_per(5000))
+
+
+def _establishment_ids(db: Session):
+    q = db.query(User.id).join(Profile, Profile.user_id == User.id).filter(User.role == "establishment")
+    return (r.id for r in q.yield_per(5000))
+
+
+def _artwork_ids(db: Session):
+    q = (
+        db.query(ProfileGallery.id)
+        .join(User, User.id == ProfileGallery.user_id)
+        .join(Profile, Profile.user_id == User.id)
+        .filter(User.role == "artist")
+    )
+    return (r.id for r in q.yield_per(5000))
 
-    return {
-        "page": page,
-        "size": limit,
-        "total": total,
-        "items": [
-            {
-                "id": r.id,
-                "establishment_id": r.establishment_id,
-                "establishment_name": r.establishment_name,
-                "establishment_image_url": public_media_url(r.establishment_image_url),
-                "title": r.title,
-                "description": r.description,
-                "starts_at": r.starts_at.isoformat() if r.starts_at else None,
-                "ends_at": r.ends_at.isoformat() if r.ends_at else None,
-                "location": r.location,
-                "image_url": public_media_url(r.image_url),
-            }
-            for r in rows
-        ],
-    }
 
-@router.get("/home")
+def _event_ids(db: Session):
+    q = (
+        db.query(Event.id)
+        .join(User, User.id == Event.establishment_id)
+        .join(Profile, Profile.user_id == User.id)
+        .filter(User.role == "establishment")
+    )
+    return (r.id for r in q.yield_per(5000))
+
+
+home_pools = {
+    name: RandomIdPool(loader, settings.HOME_POOL_SIZE, settings.HOME_POOL_TTL_SECONDS)
+    for name, loader in (
+        ("artists", _artist_ids),
+        ("establishments", _establishment_ids),
+        ("artworks", _artwork_ids),
+        ("events", _event_ids),
+    )
+}
+
+
+def sample_rows(db: Session, pool: RandomIdPool, q, id_column, k: int, wait_for_pool: bool = True):
+    ids = pool.sample(db, k, wait=wait_for_pool)
+    if not ids:
+        return []
+    rows, missing = order_by_ids(q.filter(id_column.in_(ids)).all(), ids)
+    pool.discard(missing)
+    return rows
+
+
+@router.get("/home", response_model=HomeOut)
+@query_budget(8)
 def home_swipers(
     artists_size: int = Query(10, ge=1, le=30),
     establishments_size: int = Query(10, ge=1, le=30),
     artworks_size: int = Query(10, ge=1, le=30),
     events_size: int = Query(10, ge=1, le=30),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
+    return home_payload(db, artists_size, establishments_size, artworks_size, events_size)
+
+
+def home_payload(db: Session, artists_size: int, establishments_size: int, artworks_size: int, events_size: int):
+    # Version fijada aqui: si hay un bump() mientras se arma el payload, se guarda bajo la vieja
+    cache_key = home_cache.key_for((artists_size, establishments_size, artworks_size, events_size))
+    cached = home_cache.get(cache_key)
+    if cached is not MISSING:
+        return cached
+
+    payload = build_home_payload(db, artists_size, establishments_size, artworks_size, events_size)
+    if home_cacheable():
+        home_cache.set(cache_key, payload)
+    return payload
+
+
+def home_cacheable() -> bool:
+    # Con wait_for_pool=False un pool aun sin cargar deja su seccion vacia: eso no se cachea
+    return all(pool.loaded for pool in home_pools.values())
+
+
+def build_home_payload(
+    db: Session,
+    artists_size: int,
+    establishments_size: int,
+    artworks_size: int,
+    events_size: int,
+    wait_for_pool: bool = True,
+) -> HomeOut:
     # --- ARTISTS (cards para swiper) ---
-    artists_rows = (
+    artists_rows = sample_rows(
+        db,
+        home_pools["artists"],
         db.query(User.id, Profile.display_name, Profile.profile_image_url, Profile.artistic_style)
         .join(Profile, Profile.user_id == User.id)
-        .filter(User.role == "artist")
-        .order_by(func.rand())  # MySQL
-        .limit(artists_size)
-        .all()
+        .filter(User.role == "artist"),
+        User.id,
+        artists_size,
+        wait_for_pool,
     )
 
     # --- ESTABLISHMENTS (cards para swiper) ---
-    est_rows = (
+    est_rows = sample_rows(
+        db,
+        home_pools["establishments"],
         db.query(User.id, Profile.display_name, Profile.profile_image_url, Profile.category, Profile.municipality)
         .join(Profile, Profile.user_id == User.id)
-        .filter(User.role == "establishment")
-        .order_by(func.rand())
-        .limit(establishments_size)
-        .all()
+        .filter(User.role == "establishment"),
+        User.id,
+        establishments_size,
+        wait_for_pool,
     )
 
     # --- ARTWORKS (slides de obras, usando ProfileGallery) ---
-    artworks_rows = (
+    artworks_rows = sample_rows(
+        db,
+        home_pools["artworks"],
         db.query(
             ProfileGallery.id,
             ProfileGallery.image_url,
@@ -307,14 +476,16 @@ def home_swipers(
         )
         .join(User, User.id == ProfileGallery.user_id)
         .join(Profile, Profile.user_id == User.id)
-        .filter(User.role == "artist")
-        .order_by(func.rand())
-        .limit(artworks_size)
-        .all()
+        .filter(User.role == "artist"),
+        ProfileGallery.id,
+        artworks_size,
+        wait_for_pool,
     )
 
     # --- EVENTS (featured slides tied to establishments) ---
-    events_rows = (
+    events_rows = sample_rows(
+        db,
+        home_pools["events"],
         db.query(
             Event.id,
             Event.establishment_id,
@@ -329,125 +500,151 @@ def home_swipers(
         )
         .join(User, User.id == Event.establishment_id)
         .join(Profile, Profile.user_id == User.id)
-        .filter(User.role == "establishment")
-        .order_by(func.rand())
-        .limit(events_size)
-        .all()
+        .filter(User.role == "establishment"),
+        Event.id,
+        events_size,
+        wait_for_pool,
     )
 
-    return {
-        "events": [
-            {
-                "id": r.id,
-                "establishment_id": r.establishment_id,
-                "establishment_name": r.establishment_name,
-                "establishment_image_url": public_media_url(r.establishment_image_url),
-                "title": r.title,
-                "description": r.description,
-                "starts_at": r.starts_at.isoformat() if r.starts_at else None,
-                "ends_at": r.ends_at.isoformat() if r.ends_at else None,
-                "location": r.location,
-                "image_url": public_media_url(r.image_url),
-            }
-            for r in events_rows
-        ],
-        "artists": [
-            {
-                "user_id": r.id,
-                "display_name": r.display_name,
-                "profile_image_url": public_media_url(r.profile_image_url),
-                "artistic_style": r.artistic_style,
-            }
-            for r in artists_rows
-        ],
-        "establishments": [
-            {
-                "user_id": r.id,
-                "display_name": r.display_name,
-                "profile_image_url": public_media_url(r.profile_image_url),
-                "category": r.category,
-                "municipality": r.municipality,
-            }
-            for r in est_rows
-        ],
-        "artworks": [
-            {
-                "gallery_id": r.id,
-                "image_url": public_media_url(r.image_url),
-                "title": r.title,
-                "size": r.size,
-                "price": float(r.price) if r.price is not None else None,
-                "description": r.description,
-                "user_id": r.user_id,
-                "artist_name": r.artist_name,
-            }
-            for r in artworks_rows
-        ],
-    }
+    return HomeOut(
+        events=[event_card(r) for r in events_rows],
+        artists=[artist_card(r) for r in artists_rows],
+        establishments=[establishment_card(r) for r in est_rows],
+        artworks=[HomeArtworkCard(**artwork_fields(r), artist_name=r.artist_name) for r in artworks_rows],
+    )
 
-@router.get("/artist/{user_id}")
-def get_public_artist(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(
-        User.id == user_id,
-        User.role == "artist"
-    ).first()
+# ETag/Last-Modified de las fichas publicas. El ETag es un hash del cuerpo: updated_at es
+# TIMESTAMP de MySQL (resolucion de segundos) y dos ediciones en el mismo segundo dejaban
+# el mismo validador (304 con datos viejos). Last-Modified sale de los updated_at.
+def detail_validators(payload: BaseModel, updated_at: list[datetime | None]) -> tuple[str, datetime | None]:
+    stamps = [value for value in updated_at if value is not None]
+    last_modified = max(stamps) if stamps else None
+    return f'W/"{hashlib.sha1(payload.model_dump_json().encode()).hexdigest()[:20]}"', last_modified
 
-    if not user:
-        raise HTTPException(404, "Artist not found")
 
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Comparacion debil (RFC 9110): se ignora el prefijo W/
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
+
+def validator_headers(etag: str, last_modified: datetime | None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        # TIMESTAMP sin zona: se guarda en UTC
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def conditional_response(request: Request, response: Response, etag: str, last_modified: datetime | None):
+    headers = validator_headers(etag, last_modified)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+@router.get("/artist/{user_id}", response_model=PublicArtistOut)
+@query_budget(1)
+def get_public_artist(
+    user_id: int,
+    request: Request,
+    response: Response,
+    gallery_page: int = Query(1, ge=1),
+    gallery_size: int | None = Query(None, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    gallery_q = db.query(ProfileGallery).filter(ProfileGallery.user_id == user_id).order_by(ProfileGallery.id)
+    if gallery_size is not None:
+        gallery_q = gallery_q.offset((gallery_page - 1) * gallery_size).limit(gallery_size)
+    gallery = aliased(ProfileGallery, gallery_q.subquery())
+
+    gallery_total = (
+        select(func.count(ProfileGallery.id))
+        .where(ProfileGallery.user_id == user_id)
+        .scalar_subquery()
+    )
+    gallery_updated_at = (
+        select(func.max(ProfileGallery.updated_at))
+        .where(ProfileGallery.user_id == user_id)
+        .scalar_subquery()
+    )
 
-    gallery = db.query(ProfileGallery).filter(
-        ProfileGallery.user_id == user_id
-    ).all()
+    # Una sola consulta: perfil + pagina de galeria (LEFT JOIN) + total/ultimo cambio
+    rows = (
+        db.query(Profile, gallery, gallery_total, gallery_updated_at)
+        .join(User, User.id == Profile.user_id)
+        .outerjoin(gallery, true())
+        .filter(Profile.user_id == user_id, User.role == "artist")
+        .order_by(gallery.id)
+        .all()
+    )
+    if not rows:
+        raise HTTPException(404, "Artist not found")
 
-    return {
-        "user_id": user.id,
-        "display_name": profile.display_name,
-        "profile_image_url": public_media_url(profile.profile_image_url),
-        "bio": profile.bio,
-        "artistic_style": profile.artistic_style,
-        "gallery": [
-            {
-                "id": g.id,
-                "image_url": public_media_url(g.image_url),
-                "title": g.title,
-                "size": g.size,
-                "price": float(g.price) if g.price is not None else None,
-                "description": g.description,
-            }
-            for g in gallery
-        ]
-    }
+    profile, _, total, gallery_changed_at = rows[0]
+    payload = PublicArtistOut(
+        user_id=profile.user_id,
+        display_name=profile.display_name,
+        profile_image_url=public_media_url(profile.profile_image_url),
+        bio=profile.bio,
+        artistic_style=profile.artistic_style,
+        gallery_total=total,
+        gallery=[
+            PublicGalleryItem(
+                id=g.id,
+                image_url=public_media_url(g.image_url),
+                image_thumb_url=public_media_variant_url(g.image_url, "card"),
+                title=g.title,
+                size=g.size,
+                price=g.price,
+                description=g.description,
+            )
+            for _, g, _, _ in rows
+            if g is not None
+        ],
+    )
+    etag, last_modified = detail_validators(payload, [profile.updated_at, gallery_changed_at])
+    return conditional_response(request, response, etag, last_modified) or payload
 
 
-@router.get("/establishment/{user_id}")
-def get_public_establishment(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(
-        User.id == user_id,
-        User.role == "establishment"
-    ).first()
+@router.get("/establishment/{user_id}", response_model=PublicEstablishmentOut)
+@query_budget(1)
+def get_public_establishment(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    profile = (
+        db.query(Profile)
+        .join(User, User.id == Profile.user_id)
+        .filter(Profile.user_id == user_id, User.role == "establishment")
+        .first()
+    )
 
-    if not user:
+    if not profile:
         raise HTTPException(404, "Establishment not found")
 
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
-
     # OJO: normalmente establishments NO tienen gallery, pero si luego quieres fotos del lugar:
     # gallery = db.query(ProfileGallery).filter(ProfileGallery.user_id == user_id).all()
 
-    return {
-        "user_id": user.id,
-        "display_name": profile.display_name,
-        "profile_image_url": public_media_url(profile.profile_image_url),
-        "category": profile.category,
-        "street": profile.street,
-        "number": profile.number,
-        "postal_code": profile.postal_code,
-        "colony": profile.colony,
-        "municipality": profile.municipality,
-        # "gallery": [{"id": g.id, "image_url": g.image_url} for g in gallery],
-    }
+    payload = PublicEstablishmentOut(
+        user_id=profile.user_id,
+        display_name=profile.display_name,
+        profile_image_url=public_media_url(profile.profile_image_url),
+        category=profile.category,
+        street=profile.street,
+        number=profile.number,
+        postal_code=profile.postal_code,
+        colony=profile.colony,
+        municipality=profile.municipality,
+        # gallery=[...],
+    )
+    etag, last_modified = detail_validators(payload, [profile.updated_at])
+    return conditional_response(request, response, etag, last_modified) or payload
 
 
 class BankInfoOut(BaseModel):
@@ -456,6 +653,7 @@ class BankInfoOut(BaseModel):
     clabe: str
 
 @router.get("/bank-info", response_model=BankInfoOut)
+@query_budget(0)
 def get_bank_info():
     return BankInfoOut(
         bank=settings.BANK_NAME,
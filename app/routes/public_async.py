@@ -0,0 +1,161 @@
+import anyio
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MISSING, home_cache
+from app.core.timing import query_budget
+from app.deps import get_async_db
+from app.routes import public
+from app.schemas import (
+    HomeOut,
+    PublicArtistOut,
+    PublicArtistsPage,
+    PublicArtworksPage,
+    PublicEstablishmentOut,
+    PublicEstablishmentsPage,
+    PublicEventsPage,
+)
+
+# Mismas rutas que app.routes.public, en handlers async (se monta con DB_ASYNC_PUBLIC).
+# La logica y las consultas son las de public.py: AsyncSession.run_sync las ejecuta con el
+# driver async, asi que mientras se espera a la BD no se ocupa un hilo del threadpool.
+router = APIRouter(prefix="/public", tags=["public"])
+
+
+async def home_cache_call(fn, *args):
+    # run_sync corre en el event loop: con backend compartido (Redis, cliente bloqueante) la
+    # cache va a un hilo; la cache en memoria es un dict con lock y se usa directo
+    if home_cache.backend is None:
+        return fn(*args)
+    return await anyio.to_thread.run_sync(fn, *args)
+
+
+@router.get("/artists", response_model=PublicArtistsPage)
+@query_budget(2)
+async def list_artists(
+    search: str | None = Query(default=None),
+    search_field: str | None = Query(default=None),
+    page: int = 1,
+    size: int = 20,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(
+        lambda s: public.list_artists(search=search, search_field=search_field, page=page, size=size, db=s)
+    )
+
+
+@router.get("/establishments", response_model=PublicEstablishmentsPage)
+@query_budget(2)
+async def list_establishments(
+    search: str | None = Query(default=None),
+    page: int = 1,
+    size: int = 20,
+    cursor: str | None = Query(default=None),
+    include_total: bool | None = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(
+        lambda s: public.list_establishments(
+            search=search, page=page, size=size, cursor=cursor, include_total=include_total, db=s,
+        )
+    )
+
+
+@router.get("/artworks", response_model=PublicArtworksPage)
+@query_budget(2)
+async def list_artworks(
+    search: str | None = Query(default=None),
+    search_field: str | None = Query(default=None),
+    page: int = 1,
+    size: int = 20,
+    cursor: str | None = Query(default=None),
+    include_total: bool | None = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(
+        lambda s: public.list_artworks(
+            search=search,
+            search_field=search_field,
+            page=page,
+            size=size,
+            cursor=cursor,
+            include_total=include_total,
+            db=s,
+        )
+    )
+
+
+@router.get("/events", response_model=PublicEventsPage)
+@query_budget(2)
+async def list_events(
+    search: str | None = Query(default=None),
+    page: int = 1,
+    size: int = 20,
+    cursor: str | None = Query(default=None),
+    include_total: bool | None = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(
+        lambda s: public.list_events(
+            search=search, page=page, size=size, cursor=cursor, include_total=include_total, db=s,
+        )
+    )
+
+
+@router.get("/home", response_model=HomeOut)
+@query_budget(8)
+async def home_swipers(
+    artists_size: int = Query(10, ge=1, le=30),
+    establishments_size: int = Query(10, ge=1, le=30),
+    artworks_size: int = Query(10, ge=1, le=30),
+    events_size: int = Query(10, ge=1, le=30),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Lo mismo que public.home_payload, con la cache fuera de run_sync (ver home_cache_call)
+    cache_key = await home_cache_call(home_cache.key_for, (artists_size, establishments_size, artworks_size, events_size))
+    cached = await home_cache_call(home_cache.get, cache_key)
+    if cached is not MISSING:
+        return cached
+
+    # wait_for_pool=False: en el event loop no se puede esperar el lock de recarga de los pools
+    payload = await db.run_sync(
+        lambda s: public.build_home_payload(
+            s, artists_size, establishments_size, artworks_size, events_size, wait_for_pool=False,
+        )
+    )
+    if public.home_cacheable():
+        await home_cache_call(home_cache.set, cache_key, payload)
+    return payload
+
+
+
+@router.get("/artist/{user_id}", response_model=PublicArtistOut)
+@query_budget(1)
+async def get_public_artist(
+    user_id: int,
+    request: Request,
+    response: Response,
+    gallery_page: int = Query(1, ge=1),
+    gallery_size: int | None = Query(None, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(
+        lambda s: public.get_public_artist(user_id, request, response, gallery_page, gallery_size, db=s)
+    )
+
+
+@router.get("/establishment/{user_id}", response_model=PublicEstablishmentOut)
+@query_budget(1)
+async def get_public_establishment(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(lambda s: public.get_public_establishment(user_id, request, response, db=s))
+
+
+@router.get("/bank-info", response_model=public.BankInfoOut)
+@query_budget(0)
+async def get_bank_info():
+    return public.get_bank_info()
@@ -108,6 +108,110 @@ class EventOut(BaseModel):
     location: Optional[str]
     image_url: Optional[str]
 
+# Respuestas de /public: con response_model FastAPI serializa en pydantic-core (sin jsonable_encoder)
+class PublicArtistCard(BaseModel):
+    user_id: int
+    display_name: str
+    profile_image_url: Optional[str] = None
+    profile_image_thumb_url: Optional[str] = None
+    artistic_style: Optional[str] = None
+
+class PublicEstablishmentCard(BaseModel):
+    user_id: int
+    display_name: str
+    profile_image_url: Optional[str] = None
+    profile_image_thumb_url: Optional[str] = None
+    category: Optional[str] = None
+    municipality: Optional[str] = None
+
+class PublicArtworkBase(BaseModel):
+    gallery_id: int
+    image_url: Optional[str] = None
+    image_thumb_url: Optional[str] = None
+    title: Optional[str] = None
+    size: Optional[str] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+    user_id: int
+
+class PublicArtworkCard(PublicArtworkBase):
+    display_name: str
+
+class HomeArtworkCard(PublicArtworkBase):
+    artist_name: str
+
+class PublicEventCard(BaseModel):
+    id: int
+    establishment_id: int
+    establishment_name: str
+    establishment_image_url: Optional[str] = None
+    establishment_image_thumb_url: Optional[str] = None
+    title: str
+    description: Optional[str] = None
+    starts_at: datetime
+    ends_at: Optional[datetime] = None
+    location: Optional[str] = None
+    image_url: Optional[str] = None
+    image_thumb_url: Optional[str] = None
+
+class PublicArtistsPage(BaseModel):
+    page: int
+    size: int
+    total: int
+    items: List[PublicArtistCard]
+
+class PublicPageMeta(BaseModel):
+    # page/total son None al paginar por cursor (ver fetch_page)
+    page: Optional[int] = None
+    size: int
+    total: Optional[int] = None
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+class PublicEstablishmentsPage(PublicPageMeta):
+    items: List[PublicEstablishmentCard]
+
+class PublicArtworksPage(PublicPageMeta):
+    items: List[PublicArtworkCard]
+
+class PublicEventsPage(PublicPageMeta):
+    items: List[PublicEventCard]
+
+class HomeOut(BaseModel):
+    events: List[PublicEventCard]
+    artists: List[PublicArtistCard]
+    establishments: List[PublicEstablishmentCard]
+    artworks: List[HomeArtworkCard]
+
+class PublicGalleryItem(BaseModel):
+    id: int
+    image_url: Optional[str] = None
+    image_thumb_url: Optional[str] = None
+    title: Optional[str] = None
+    size: Optional[str] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+
+class PublicArtistOut(BaseModel):
+    user_id: int
+    display_name: str
+    profile_image_url: Optional[str] = None
+    bio: Optional[str] = None
+    artistic_style: Optional[str] = None
+    gallery_total: int
+    gallery: List[PublicGalleryItem]
+
+class PublicEstablishmentOut(BaseModel):
+    user_id: int
+    display_name: str
+    profile_image_url: Optional[str] = None
+    category: Optional[str] = None
+    street: Optional[str] = None
+    number: Optional[str] = None
+    postal_code: Optional[str] = None
+    colony: Optional[str] = None
+    municipality: Optional[str] = None
+
 class ProfileOut(BaseModel):
     role: Role
     email: EmailStr
@@ -0,0 +1,89 @@
+"""Compara el plan y el tiempo de la busqueda por nombre en /public/artworks.
+
+"old" es la expresion previa (lower() + REPLACE() anidados sobre display_name, LIKE '%term%'):
+recorre profile_gallery completa. "new" es artworks_query(): los perfiles candidatos salen de
+ix_profile_search_grams_gram (trigramas), se confirman con LIKE sobre search_name y las obras
+se leen por el indice de profile_gallery.user_id.
+
+En SQLite la consulta "old" no es la original: su parser no acepta los 42 REPLACE() anidados
+y se omiten los de mayusculas. Esa salida se marca como no comparable; para comparar los
+tiempos, correr contra MySQL (DB_URL=mysql+pymysql://...).
+
+    python -m scripts.bench_artwork_search --artists 2000 --artworks 20000 --search jose
+
+Usa DB_URL si esta definido; si no, una base SQLite temporal.
+"""
+import argparse
+import random
+import time
+
+from scripts.seed_data import seed  # primero: define DB_URL/JWT_SECRET por defecto
+
+from sqlalchemy import func, or_, text  # noqa: E402
+
+from app.core.search import ACCENT_REPLACEMENTS, normalize_search_text  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models import Profile  # noqa: E402
+from app.routes.public import artworks_query  # noqa: E402
+
+
+def legacy_normalized_column(column):
+    expr = func.lower(column)
+    for accented, plain in ACCENT_REPLACEMENTS:
+        expr = func.replace(expr, accented, plain)
+        # SQLite no parsea los 42 REPLACE() anidados ("parser stack overflow")
+        if engine.dialect.name != "sqlite":
+            expr = func.replace(expr, accented.upper(), plain)
+    return expr
+
+
+def legacy_artworks_query(db, search: str):
+    q = artworks_query(db)
+    s = f"%{search.strip()}%"
+    return q.filter(or_(
+        legacy_normalized_column(Profile.display_name).like(f"%{normalize_search_text(search)}%"),
+        Profile.artistic_style.like(s),
+    ))
+
+
+def explain(db, q) -> list[str]:
+    compiled = q.statement.compile(engine, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    return [" | ".join(str(col) for col in row) for row in db.execute(text(f"{prefix} {compiled}"))]
+
+
+def timed(q, repeat: int, size: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        total = q.count()
+        q.offset(0).limit(size).all()
+    return (time.perf_counter() - start) / repeat * 1000, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--artworks", type=int, default=20000)
+    parser.add_argument("--search", default="nunez")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    seed(args.artists, 0, args.artworks, 0, random.Random(args.seed))
+    db = SessionLocal()
+    try:
+        for label, q in (
+            ("old", legacy_artworks_query(db, args.search)),
+            ("new", artworks_query(db, args.search)),
+        ):
+            ms, total = timed(q, args.repeat, 20)
+            note = " [NO COMPARABLE: sin los REPLACE() de mayusculas en SQLite]" if label == "old" and engine.dialect.name == "sqlite" else ""
+            print(f"== {label}: {ms:.2f} ms/request (count + page), total={total}{note}")
+            for line in explain(db, q):
+                print(f"   {line}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
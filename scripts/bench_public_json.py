@@ -0,0 +1,111 @@
+"""Compara el tiempo de serializacion de las respuestas de /public.
+
+"old" es el camino sin response_model: jsonable_encoder() recorre el dict y json.dumps()
+lo escribe (lo que hacia FastAPI con los dicts armados a mano). Los dicts se arman fuera
+de la medicion con los tipos que usaban los handlers viejos (price float, fechas isoformat).
+"new" es el camino actual: validacion del response_model (la instancia pasa tal cual),
+serializacion en pydantic-core y orjson en TimedJSONResponse.
+
+    python -m scripts.bench_public_json --artists 2000 --artworks 20000 --events 5000
+
+Usa DB_URL si esta definido; si no, una base SQLite temporal.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from scripts.seed_data import seed  # primero: define DB_URL/JWT_SECRET por defecto
+
+from fastapi import Request, Response  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+
+from app.core.timing import TimedJSONResponse  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.models import ProfileGallery  # noqa: E402
+from app.routes import public  # noqa: E402
+
+
+def old_content(value):
+    # El dict que construian los handlers viejos: float(r.price), r.starts_at.isoformat()
+    if isinstance(value, dict):
+        return {key: old_content(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [old_content(item) for item in value]
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def old_render(content) -> bytes:
+    content = jsonable_encoder(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def new_render(adapter: TypeAdapter, payload) -> bytes:
+    value = adapter.validate_python(payload)
+    return TimedJSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def timed(render, repeat: int) -> tuple[float, int]:
+    body = render()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    return (time.perf_counter() - start) / repeat * 1_000_000, len(body)
+
+
+def scenarios(db) -> dict:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    busiest_artist = (
+        db.query(ProfileGallery.user_id)
+        .group_by(ProfileGallery.user_id)
+        .order_by(func.count(ProfileGallery.id).desc())
+        .limit(1)
+        .scalar()
+    )
+    return {
+        "home (30 por seccion)": public.home_payload(db, 30, 30, 30, 30),
+        "artists (100)": public.list_artists(search=None, search_field=None, page=1, size=100, db=db),
+        "artworks (100)": public.list_artworks(
+            search=None, search_field=None, page=1, size=100, cursor=None, include_total=None, db=db,
+        ),
+        "events (100)": public.list_events(search=None, page=1, size=100, cursor=None, include_total=None, db=db),
+        "artist (galeria completa)": public.get_public_artist(busiest_artist, request, Response(), 1, None, db=db),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--establishments", type=int, default=200)
+    parser.add_argument("--artworks", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    seed(args.artists, args.establishments, args.artworks, args.events, random.Random(args.seed))
+    db = SessionLocal()
+    try:
+        payloads = scenarios(db)
+    finally:
+        db.close()
+
+    print(f"{'response':<28} {'bytes':>8} {'old us':>9} {'new us':>9} {'speedup':>8}")
+    for name, payload in payloads.items():
+        adapter = TypeAdapter(type(payload))
+        content = old_content(payload.model_dump())
+        old_us, size = timed(lambda: old_render(content), args.repeat)
+        new_us, _ = timed(lambda: new_render(adapter, payload), args.repeat)
+        print(f"{name:<28} {size:>8} {old_us:>9.1f} {new_us:>9.1f} {old_us / new_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Prueba de carga de los endpoints publicos: p50/p95/p99, throughput y consultas por request.
+
+    # En proceso (ASGI, sin red), sembrando la base si esta vacia:
+    python -m scripts.load_test --seed-artists 5000 --seed-artworks 50000 --seed-events 10000
+
+    # Contra un servidor ya levantado (sin conteo de consultas):
+    python -m scripts.load_test --base-url http://127.0.0.1:8000
+
+    # Guardar resultados y comparar contra una corrida anterior (sale con 1 si p95 empeora):
+    python -m scripts.load_test --json-out baseline.json
+    python -m scripts.load_test --baseline baseline.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import sys
+import time
+
+from scripts.seed_data import FIRST_NAMES, LAST_NAMES, STYLES, seed  # primero: define DB_URL/JWT_SECRET por defecto
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.core.search import normalize_search_text  # noqa: E402
+
+# Consultas del request en curso (en proceso): la lista vive en el contexto de cada tarea
+current_queries: contextvars.ContextVar[list | None] = contextvars.ContextVar("current_queries", default=None)
+
+
+def endpoint_paths(rng: random.Random) -> dict:
+    # Cada llamada genera la URL del siguiente request de ese escenario
+    terms = [normalize_search_text(word) for word in FIRST_NAMES + LAST_NAMES]
+    return {
+        "home": lambda: "/public/home",
+        "artists_search": lambda: f"/public/artists?search={rng.choice(terms)}&page={rng.randint(1, 3)}",
+        "artworks": lambda: f"/public/artworks?page={rng.randint(1, 50)}",
+        "artworks_search": lambda: f"/public/artworks?search={rng.choice(terms)}",
+        "events": lambda: f"/public/events?page={rng.randint(1, 50)}",
+        "events_style": lambda: f"/public/events?search={rng.choice(STYLES)}",
+    }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    # Rango mas cercano
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+async def run_endpoint(client: httpx.AsyncClient, next_path, requests: int, concurrency: int, count_queries: bool):
+    latencies, query_counts, errors = [], [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            queries = []
+            token = current_queries.set(queries if count_queries else None)
+            start = time.perf_counter()
+            try:
+                response = await client.get(next_path())
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            finally:
+                latencies.append((time.perf_counter() - start) * 1000)
+                current_queries.reset(token)
+            query_counts.append(len(queries))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "queries_per_request": round(sum(query_counts) / len(query_counts), 2) if count_queries else None,
+    }
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    queries = current_queries.get()
+    if queries is not None:
+        queries.append(statement)
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> list[str]:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if before.get("queries_per_request") is not None and result["queries_per_request"] is not None:
+            if result["queries_per_request"] > before["queries_per_request"]:
+                regressions.append(
+                    f"{name}: queries/request {before['queries_per_request']} -> {result['queries_per_request']}"
+                )
+    return regressions
+
+
+async def main_async(args) -> dict:
+    rng = random.Random(args.seed)
+    paths = endpoint_paths(rng)
+    selected = args.endpoints.split(",") if args.endpoints else list(paths)
+    unknown = set(selected) - set(paths)
+    if unknown:
+        sys.exit(f"unknown endpoints: {', '.join(sorted(unknown))} (available: {', '.join(paths)})")
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+        count_queries = False
+    else:
+        from app.db.session import engine
+        from app.main import app
+
+        seed(
+            args.seed_artists,
+            args.seed_establishments,
+            args.seed_artworks,
+            args.seed_events,
+            random.Random(args.seed),
+        )
+        event.listen(engine, "before_cursor_execute", _count_query)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test", timeout=30)
+        count_queries = True
+
+    results = {}
+    async with client:
+        for name in selected:
+            await run_endpoint(client, paths[name], args.warmup, min(args.concurrency, max(args.warmup, 1)), False)
+            results[name] = await run_endpoint(client, paths[name], args.requests, args.concurrency, count_queries)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", help="servidor HTTP; si se omite, la app corre en proceso")
+    parser.add_argument("--endpoints", help="lista separada por comas (por defecto todos)")
+    parser.add_argument("--requests", type=int, default=200, help="requests por endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seed-artists", type=int, default=5000)
+    parser.add_argument("--seed-establishments", type=int, default=500)
+    parser.add_argument("--seed-artworks", type=int, default=50000)
+    parser.add_argument("--seed-events", type=int, default=10000)
+    parser.add_argument("--json-out")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="empeoramiento de p95 permitido")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    print(f"{'endpoint':<18} {'reqs':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>8} {'queries':>8}")
+    for name, r in results.items():
+        queries = "-" if r["queries_per_request"] is None else f"{r['queries_per_request']:.2f}"
+        print(
+            f"{name:<18} {r['requests']:>6} {r['errors']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+            f"{r['p99_ms']:>9.2f} {r['rps']:>8.1f} {queries:>8}"
+        )
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Genera datos sinteticos (artistas, establecimientos, obras, eventos) para pruebas de carga.
+
+    python -m scripts.seed_data --artists 50000 --artworks 500000 --events 100000
+
+Usa DB_URL si esta definido; si no, una base SQLite temporal. Solo siembra si la tabla
+users esta vacia (con --force agrega de todos modos, a partir del id maximo).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'seed.db')}")
+for _name in ("JWT_SECRET", "BANK_NAME", "BANK_ACCOUNT", "BANK_CLABE"):
+    os.environ.setdefault(_name, "bench")
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.core.search import search_column_value, search_gram_rows  # noqa: E402
+from app.db.migrations import upgrade  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.models import Event, Profile, ProfileGallery, ProfileSearchGram, User  # noqa: E402
+
+FIRST_NAMES = [
+    "José", "María", "Ángel", "Sofía", "Raúl", "Inés", "Martín", "Lucía", "Tomás", "Begoña",
+    "Jesús", "Mónica", "Andrés", "Verónica", "Nicolás", "Ximena", "Héctor", "Renée", "Iñaki", "Zoë",
+]
+LAST_NAMES = [
+    "Pérez", "Núñez", "Gómez", "Ibáñez", "Méndez", "Ordóñez", "Suárez", "Rodríguez", "Muñoz", "Jiménez",
+    "Hernández", "Martínez", "López", "Sánchez", "Ramírez", "Vázquez", "Castañeda", "Peña", "Quiñones", "Álvarez",
+]
+STYLES = ["Óleo", "Acuarela", "Escultura", "Fotografía", "Grabado", "Arte urbano", "Cerámica", "Ilustración digital"]
+CATEGORIES = ["Café", "Galería", "Bar", "Librería", "Restaurante", "Centro cultural"]
+PLACE_WORDS = ["La Cigüeña", "El Rincón", "Casa Añil", "Patio Azul", "El Jardín", "La Estación", "Café Ámbar"]
+MUNICIPALITIES = ["Coyoacán", "Benito Juárez", "Cuauhtémoc", "Tlalpan", "Álvaro Obregón", "Querétaro", "Mérida"]
+ARTWORK_WORDS = ["Atardecer", "Sueño", "Jardín", "Mañana", "Niña", "Corazón", "Océano", "Montaña", "Canción"]
+EVENT_WORDS = ["Exposición", "Noche de", "Taller de", "Inauguración", "Feria de", "Charla sobre"]
+
+
+def _next_id(conn, column) -> int:
+    return (conn.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def _insert_batches(model, rows, batch_size: int) -> int:
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with engine.begin() as conn:
+                conn.execute(insert(model), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(insert(model), batch)
+        count += len(batch)
+    return count
+
+
+def _person_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def seed(
+    artists: int,
+    establishments: int,
+    artworks: int,
+    events: int,
+    rng: random.Random,
+    batch_size: int = 5000,
+    force: bool = False,
+) -> dict:
+    upgrade(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count(User.id))).scalar() and not force:
+            return {}
+        first_user = _next_id(conn, User.id)
+        first_artwork = _next_id(conn, ProfileGallery.id)
+        first_event = _next_id(conn, Event.id)
+
+    # ids explicitos: el seed no depende de AUTO_INCREMENT y se puede repetir con la misma semilla
+    artist_ids = range(first_user, first_user + artists)
+    establishment_ids = range(first_user + artists, first_user + artists + establishments)
+
+    def users():
+        for user_id in artist_ids:
+            yield {"id": user_id, "role": "artist", "email": f"artist{user_id}@seed.local", "password_hash": "x"}
+        for user_id in establishment_ids:
+            yield {"id": user_id, "role": "establishment", "email": f"place{user_id}@seed.local", "password_hash": "x"}
+
+    # executemany necesita las mismas claves en todas las filas del lote
+    profile_columns = dict.fromkeys(
+        ["bio", "artistic_style", "category", "street", "number", "postal_code", "colony", "municipality", "search_style"]
+    )
+
+    # insert(Profile) no dispara los eventos del ORM: los trigramas de busqueda se arman aqui
+    grams = []
+
+    def profiles():
+        for row in profile_rows():
+            grams.extend(search_gram_rows(row["user_id"], row["search_name"], row["search_style"]))
+            yield row
+
+    def profile_rows():
+        for user_id in artist_ids:
+            name, style = _person_name(rng), rng.choice(STYLES)
+            yield {
+                **profile_columns,
+                "user_id": user_id,
+                "display_name": name,
+                "artistic_style": style,
+                "bio": f"{name} trabaja {style.lower()} desde hace {rng.randint(1, 30)} años.",
+                "profile_image_url": f"seed/artist{user_id}.jpg",
+                "search_name": search_column_value(name),
+                "search_style": search_column_value(style),
+            }
+        for user_id in establishment_ids:
+            name = f"{rng.choice(PLACE_WORDS)} {rng.choice(LAST_NAMES)}"
+            yield {
+                **profile_columns,
+                "user_id": user_id,
+                "display_name": name,
+                "category": rng.choice(CATEGORIES),
+                "street": f"Calle {rng.choice(LAST_NAMES)}",
+                "number": str(rng.randint(1, 999)),
+                "postal_code": f"{rng.randint(1000, 99999):05d}",
+                "colony": f"Col. {rng.choice(FIRST_NAMES)}",
+                "municipality": rng.choice(MUNICIPALITIES),
+                "profile_image_url": f"seed/place{user_id}.jpg",
+                "search_name": search_column_value(name),
+            }
+
+    def gallery():
+        for item_id in range(first_artwork, first_artwork + artworks):
+            yield {
+                "id": item_id,
+                "user_id": rng.choice(artist_ids),
+                "image_url": f"seed/artwork{item_id}.jpg",
+                "title": f"{rng.choice(ARTWORK_WORDS)} {rng.randint(1, 99)}",
+                "price": rng.randint(5, 500) * 100,
+            }
+
+    now = datetime.utcnow().replace(microsecond=0)
+
+    def event_rows():
+        for item_id in range(first_event, first_event + events):
+            starts_at = now + timedelta(hours=rng.randint(-24 * 30, 24 * 180))
+            yield {
+                "id": item_id,
+                "establishment_id": rng.choice(establishment_ids),
+                "title": f"{rng.choice(EVENT_WORDS)} {rng.choice(STYLES).lower()}",
+                "description": "Entrada libre.",
+                "starts_at": starts_at,
+                "ends_at": starts_at + timedelta(hours=rng.randint(1, 6)),
+                "location": rng.choice(MUNICIPALITIES),
+                "image_url": f"seed/event{item_id}.jpg",
+            }
+
+    if artworks and not artists:
+        raise ValueError("artworks need at least one artist")
+    if events and not establishments:
+        raise ValueError("events need at least one establishment")
+
+    return {
+        "users": _insert_batches(User, users(), batch_size),
+        "profiles": _insert_batches(Profile, profiles(), batch_size),
+        "search_grams": _insert_batches(ProfileSearchGram, grams, batch_size),
+        "artworks": _insert_batches(ProfileGallery, gallery(), batch_size),
+        "events": _insert_batches(Event, event_rows(), batch_size),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artists", type=int, default=50_000)
+    parser.add_argument("--establishments", type=int, default=5_000)
+    parser.add_argument("--artworks", type=int, default=500_000)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = seed(
+        args.artists,
+        args.establishments,
+        args.artworks,
+        args.events,
+        random.Random(args.seed),
+        batch_size=args.batch_size,
+        force=args.force,
+    )
+    if not counts:
+        print("users table is not empty; nothing seeded (use --force to append)")
+        return
+    print(f"{engine.url.render_as_string(hide_password=True)}: {counts} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
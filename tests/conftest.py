@@ -0,0 +1,74 @@
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+# Antes de importar app.*: Settings se lee al importar y app.main crea el esquema
+_tmp_dir = tempfile.mkdtemp(prefix="quetzart-tests-")
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ["MEDIA_DIR"] = os.path.join(_tmp_dir, "media")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("BANK_NAME", "Banco")
+os.environ.setdefault("BANK_ACCOUNT", "0000")
+os.environ.setdefault("BANK_CLABE", "000000000000000000")
+os.environ["MEDIA_DERIVATIVES"] = "false"
+# Toda ruta que se pase de su @query_budget o repita una consulta (N+1) falla el test
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import BigInteger  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+
+# En SQLite solo INTEGER PRIMARY KEY es autoincremental; en MySQL sigue siendo BIGINT
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    return "INTEGER"
+
+
+from app.core.security import create_access_token  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.deps import token_cache, user_cache  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Event, Profile, ProfileGallery, User  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    # Sin `with`: no corre el lifespan (tareas periodicas, SMTP)
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(autouse=True)
+def cold_auth_cache():
+    # Cada test cuenta consultas desde cero (el usuario se carga de la BD)
+    token_cache.clear()
+    user_cache.clear()
+
+
+def make_user(db, role: str, gallery: int = 0, events: int = 0) -> tuple[User, str]:
+    user = User(role=role, email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    db.add(Profile(user_id=user.id, display_name=f"{role} {user.id}", artistic_style="pop"))
+    for i in range(gallery):
+        db.add(ProfileGallery(user_id=user.id, image_url=f"https://cdn.test/{user.id}/{i}.jpg", title=f"Obra {i}"))
+    starts_at = datetime.utcnow() + timedelta(days=1)
+    for i in range(events):
+        db.add(Event(establishment_id=user.id, title=f"Evento {i}", starts_at=starts_at + timedelta(hours=i)))
+    db.commit()
+    return user, create_access_token(sub=str(user.id), role=role)
+
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
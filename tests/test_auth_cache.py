@@ -0,0 +1,40 @@
+from app.db.session import SessionLocal
+from app.deps import _load_user, user_cache
+
+from tests.conftest import make_user
+
+
+def load_email(user_id: int) -> str:
+    session = SessionLocal()
+    try:
+        return _load_user(session, user_id).email
+    finally:
+        session.close()
+
+
+def test_user_cache_is_invalidated_after_commit_not_at_flush(db):
+    user, _ = make_user(db, "artist")
+    old_email = user.email
+    assert load_email(user.id) == old_email
+
+    user.email = f"nuevo-{old_email}"
+    db.flush()
+    # Otro request entre el flush y el commit lee (y cachea) la fila confirmada
+    user_cache.clear()
+    assert load_email(user.id) == old_email
+
+    db.commit()
+    assert load_email(user.id) == f"nuevo-{old_email}"
+
+
+def test_rolled_back_write_keeps_the_cached_user(db):
+    user, _ = make_user(db, "artist")
+    assert load_email(user.id) == user.email
+    email = user.email
+
+    user.email = f"otro-{email}"
+    db.flush()
+    db.rollback()
+
+    assert user_cache.get(user.id)["email"] == email
+    assert load_email(user.id) == email
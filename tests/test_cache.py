@@ -0,0 +1,50 @@
+from app.core.cache import MISSING, VersionedCache
+
+
+class DictBackend:
+    """Backend compartido en memoria; cuenta las lecturas de la version."""
+
+    def __init__(self):
+        self.data = {}
+        self.version_reads = 0
+
+    def get(self, key):
+        if key.endswith(":version"):
+            self.version_reads += 1
+        return self.data.get(key)
+
+    def set(self, key, value, ttl_seconds):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+def test_bump_during_compute_does_not_store_under_new_version():
+    cache = VersionedCache("t", maxsize=8, ttl_seconds=30, backend=DictBackend())
+    key = cache.key_for(("home", 1))
+    assert cache.get(key) is MISSING
+    cache.bump()  # una escritura mientras se arma el payload
+    cache.set(key, {"stale": True})
+    assert cache.get(cache.key_for(("home", 1))) is MISSING
+
+
+def test_backend_version_is_read_at_most_once_per_ttl():
+    backend = DictBackend()
+    cache = VersionedCache("t", maxsize=8, ttl_seconds=30, backend=backend, version_ttl_seconds=60)
+    for _ in range(5):
+        cache.get(cache.key_for("k"))
+    assert backend.version_reads == 1
+
+
+def test_bump_from_another_worker_is_seen_and_reported():
+    backend = DictBackend()
+    worker_a = VersionedCache("t", maxsize=8, ttl_seconds=30, backend=backend, version_ttl_seconds=0)
+    worker_b = VersionedCache("t", maxsize=8, ttl_seconds=30, backend=backend, version_ttl_seconds=0)
+    key = worker_a.key_for("k")
+    worker_a.set(key, [1])
+    worker_b.bump()
+
+    assert worker_a.get(worker_a.key_for("k")) is MISSING
+    assert worker_a.stats()["version"] == 1
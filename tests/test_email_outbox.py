@@ -0,0 +1,107 @@
+import logging
+import socketserver
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.core.email import OutboxSender, SMTPConnectionPool, enqueue_email
+from app.models import EmailOutbox
+
+REJECTED = "rebota@example.com"
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    # Lo minimo de SMTP que usa smtplib.send_message (sin STARTTLS ni AUTH)
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 stub")
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif verb == "RCPT" and REJECTED in command:
+                self.reply("550 mailbox unavailable")
+            elif verb == "DATA":
+                self.reply("354 end with .")
+                data = b"".join(iter(lambda: self.rfile.readline(), b".\r\n"))
+                self.server.messages.append(data.decode())
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # MAIL, RCPT, NOOP, RSET
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp_stub(monkeypatch):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPStubHandler)
+    server.daemon_threads = True
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", server.server_address[1])
+    monkeypatch.setattr(settings, "SMTP_FROM", "no-reply@example.com")
+    monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_USER", None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sender():
+    pool = SMTPConnectionPool(1)
+    yield OutboxSender(pool)
+    pool.close_all()
+
+
+def enqueue(db, to_email: str) -> int:
+    row = enqueue_email(db, to_email, "Asunto", "Tu codigo es 123456")
+    db.commit()
+    return row.id
+
+
+def reload(db, row_id: int) -> EmailOutbox:
+    db.expire_all()
+    return db.get(EmailOutbox, row_id)
+
+
+def test_claimed_email_is_delivered_and_marked_sent(db, smtp_stub, sender):
+    row_id = enqueue(db, "ok@example.com")
+
+    sender.send_batch()
+
+    row = reload(db, row_id)
+    assert (row.status, row.attempts, row.body, row.last_error) == ("sent", 1, "", None)
+    assert row.sent_at is not None
+    assert any("Tu codigo es 123456" in message for message in smtp_stub.messages)
+
+
+def test_failure_backs_off_then_fails_terminally_without_body(db, smtp_stub, sender, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 2)
+    row_id = enqueue(db, REJECTED)
+
+    before = datetime.utcnow()
+    with caplog.at_level(logging.WARNING, logger="app.core.email"):
+        sender.send_batch()
+    row = reload(db, row_id)
+    assert (row.status, row.attempts, row.body) == ("pending", 1, "Tu codigo es 123456")
+    assert "550" in row.last_error
+    # Primer reintento: EMAIL_RETRY_BASE_SECONDS despues
+    delay = timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS)
+    assert before + delay <= row.next_attempt_at <= datetime.utcnow() + delay
+
+    row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    with caplog.at_level(logging.WARNING, logger="app.core.email"):
+        sender.send_batch()
+    row = reload(db, row_id)
+    assert (row.status, row.attempts, row.body) == ("failed", 2, "")
+    assert REJECTED not in caplog.text
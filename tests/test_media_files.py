@@ -0,0 +1,53 @@
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.storage import FALLBACK_CACHE_CONTROL, LocalStorage
+from app.routes.media import save_base64_image
+
+
+def test_missing_derivative_serves_original_without_listing_the_directory(client, monkeypatch):
+    with open(os.path.join(settings.MEDIA_DIR, "legacy.jpg"), "wb") as f:
+        f.write(b"original")
+
+    def no_listdir(path):
+        raise AssertionError(f"os.listdir({path!r})")
+
+    monkeypatch.setattr(os, "listdir", no_listdir)
+
+    response = client.get("/media/legacy_w640.webp")
+    assert response.status_code == 200
+    assert response.content == b"original"
+    assert response.headers["Cache-Control"] == FALLBACK_CACHE_CONTROL
+
+    assert client.get("/media/missing_w640.webp").status_code == 404
+
+
+def test_malformed_base64_payload_is_rejected_with_422():
+    with pytest.raises(HTTPException) as exc_info:
+        save_base64_image("data:image/png;base64,abc")
+    assert exc_info.value.status_code == 422
+
+
+def test_put_rewrites_a_key_deleted_between_exists_and_utime(monkeypatch):
+    storage = LocalStorage(settings.MEDIA_DIR)
+    key = f"ab/cd/ab{'0' * 62}.png"
+    path = storage.path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"viejo")
+    tmp_path = os.path.join(settings.MEDIA_DIR, "nuevo.part")
+    with open(tmp_path, "wb") as f:
+        f.write(b"nuevo")
+
+    def swept_utime(target, *args, **kwargs):
+        os.remove(target)  # el barrido de huerfanos gana la carrera
+        raise FileNotFoundError(target)
+
+    monkeypatch.setattr(os, "utime", swept_utime)
+    assert storage.put(tmp_path, key) is True
+    with open(path, "rb") as f:
+        assert f.read() == b"nuevo"
+    assert not os.path.exists(tmp_path)
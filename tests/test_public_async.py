@@ -0,0 +1,70 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.cache import home_cache
+from app.core.timing import ServerTimingMiddleware
+from app.db.session import SessionLocal, dispose_async_engine
+from app.routes import public_async
+from app.routes.public import home_pools
+
+from tests.conftest import make_user
+
+
+@pytest.fixture(scope="module")
+def ids():
+    db = SessionLocal()
+    try:
+        artist, _ = make_user(db, "artist", gallery=3)
+        artist.profile.display_name = "José Núñez"
+        establishment, _ = make_user(db, "establishment", events=2)
+        db.commit()
+        return {"artist": artist.id, "establishment": establishment.id}
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def async_client():
+    # Solo el router async sobre aiosqlite (el DB_URL de los tests con su driver async)
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+    app.include_router(public_async.router)
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(dispose_async_engine)
+
+
+@pytest.mark.parametrize("path", [
+    "/public/artists",
+    "/public/artists?search=jose&page=1&size=5",
+    "/public/artists?search=pop&search_field=style&page=2&size=3",
+    "/public/establishments?size=3",
+    "/public/establishments?size=3&cursor=WzFd&include_total=true",
+    "/public/artworks?search=nuñ",
+    "/public/artworks?search_field=style&search=pop&size=4",
+    "/public/events?size=5",
+    "/public/artist/{artist}?gallery_size=2",
+    "/public/establishment/{establishment}",
+    "/public/artist/999999999",
+    "/public/home?artists_size=3&events_size=2",
+    "/public/bank-info",
+])
+def test_async_router_matches_sync_router(client, async_client, ids, path):
+    path = path.format(**ids)
+    responses = []
+    for c in (client, async_client):
+        # /home: misma muestra en ambos (pools ya cargados, rng con la misma semilla, sin cache)
+        client.get("/public/home")
+        home_cache.local.clear()
+        for pool in home_pools.values():
+            pool._rng.seed(0)
+        responses.append(c.get(path))
+
+    sync_response, async_response = responses
+    assert async_response.status_code == sync_response.status_code
+    assert async_response.json() == sync_response.json()
+    assert async_response.headers.get("etag") == sync_response.headers.get("etag")
+    if path.startswith("/public/home"):
+        assert sync_response.json()["artists"]
+
@@ -0,0 +1,80 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.timing import QueryBudgetExceeded, ServerTimingMiddleware, query_budget
+from app.deps import get_db
+from app.models import User
+from tests.conftest import auth, make_user
+
+
+def budget_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/two-queries")
+    @query_budget(1)
+    def two_queries(db: Session = Depends(get_db)):
+        db.execute(text("SELECT 1")).scalar()
+        db.execute(text("SELECT 2")).scalar()
+        return {"ok": True}
+
+    @app.get("/n-plus-one")
+    @query_budget(100)
+    def n_plus_one(db: Session = Depends(get_db)):
+        # Misma sentencia, parametros distintos: lo que deja un lazy load por fila
+        for user_id in range(settings.QUERY_REPEAT_THRESHOLD):
+            db.execute(select(User.id).where(User.id == user_id)).first()
+        return {"ok": True}
+
+    @app.get("/within-budget")
+    @query_budget(2)
+    def within_budget(db: Session = Depends(get_db)):
+        db.execute(text("SELECT 1")).scalar()
+        return {"ok": True}
+
+    return app
+
+
+def test_conftest_enables_raise_mode():
+    assert settings.QUERY_BUDGET_MODE == "raise"
+
+
+def test_over_budget_route_fails():
+    with pytest.raises(QueryBudgetExceeded, match=r"2 queries \(budget 1\)"):
+        TestClient(budget_app()).get("/two-queries")
+
+
+def test_repeated_statement_fails():
+    with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+        TestClient(budget_app()).get("/n-plus-one")
+
+
+def test_route_within_budget_passes():
+    response = TestClient(budget_app()).get("/within-budget")
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+
+
+# Las rutas reales, de punta a punta, con el detector en modo raise
+@pytest.mark.parametrize("path", ["/profile/me", "/profile/me/artworks"])
+def test_artist_routes_within_budget(client, db, path):
+    _, token = make_user(db, "artist", gallery=12)
+    assert client.get(path, headers=auth(token)).status_code == 200
+
+
+def test_event_routes_within_budget(client, db):
+    owner, token = make_user(db, "establishment", events=12)
+    event_id = owner.events[0].id
+    assert len(client.get("/events", headers=auth(token)).json()) == 12
+    assert client.get(f"/events/{event_id}", headers=auth(token)).status_code == 200
+
+
+def test_public_routes_within_budget(client, db):
+    artist, _ = make_user(db, "artist", gallery=8)
+    make_user(db, "establishment", events=8)
+    for path in ["/public/home", "/public/artists", "/public/artworks", "/public/events", f"/public/artist/{artist.id}"]:
+        assert client.get(path).status_code == 200, path
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core.timing import count_queries
+from app.deps import get_current_user
+from app.routes import events, profile
+from tests.conftest import make_user
+
+# Mismo camino que el request: get_current_user (cache de usuario frio) + handler.
+# Los conteos no deben crecer con el numero de filas (N+1).
+
+
+@pytest.mark.parametrize("count", [1, 12])
+def test_list_my_events_queries(db, count):
+    _, token = make_user(db, "establishment", events=count)
+    db.expunge_all()
+
+    with count_queries() as stats:
+        user = get_current_user(db=db, token=token)
+        rows = events.list_my_events(db=db, user=user)
+
+    assert len(rows) == count
+    assert all(row.establishment_name for row in rows)
+    # usuario + eventos (establecimiento y perfil en el mismo JOIN)
+    assert stats.db_count == 2
+
+
+def test_get_my_event_queries(db):
+    owner, token = make_user(db, "establishment", events=3)
+    event_id = owner.events[1].id
+    db.expunge_all()
+
+    with count_queries() as stats:
+        user = get_current_user(db=db, token=token)
+        row = events.get_my_event(event_id=event_id, db=db, user=user)
+
+    assert row.id == event_id
+    assert row.establishment_name
+    assert stats.db_count == 2
+
+
+@pytest.mark.parametrize("count", [0, 15])
+def test_profile_me_queries(db, count):
+    _, token = make_user(db, "artist", gallery=count)
+    db.expunge_all()
+
+    with count_queries() as stats:
+        out = profile.me(user=get_current_user(db=db, token=token))
+
+    assert len(out.gallery) == count
+    # usuario + perfil + galeria
+    assert stats.db_count == 3
+
+
+@pytest.mark.parametrize("count", [1, 15])
+def test_profile_artworks_queries(db, count):
+    _, token = make_user(db, "artist", gallery=count)
+    db.expunge_all()
+
+    with count_queries() as stats:
+        items = profile.list_artworks(user=get_current_user(db=db, token=token))
+
+    assert len(items) == count
+    # usuario + galeria
+    assert stats.db_count == 2
+
+
+def test_cached_user_skips_user_query(db):
+    _, token = make_user(db, "artist", gallery=2)
+    profile.list_artworks(user=get_current_user(db=db, token=token))
+    db.expunge_all()
+
+    with count_queries() as stats:
+        profile.list_artworks(user=get_current_user(db=db, token=token))
+
+    assert stats.db_count == 1
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import DeclarativeBase
+
+from app.db import session as session_module
+from app.db.session import ReplicaHealth, RoutingSession
+
+
+class NoteBase(DeclarativeBase):
+    pass
+
+
+class Note(NoteBase):
+    __tablename__ = "notes"
+    id = Column(Integer, primary_key=True)
+    origin = Column(String(16), nullable=False)
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    # Dos archivos SQLite: cada uno tiene una fila que dice de donde sale la lectura
+    tmp_dir = tempfile.mkdtemp(prefix="quetzart-replica-")
+    engines = {}
+    for origin in ("primary", "replica"):
+        engines[origin] = create_engine(f"sqlite:///{os.path.join(tmp_dir, origin + '.db')}")
+        NoteBase.metadata.create_all(engines[origin])
+        with engines[origin].begin() as conn:
+            conn.execute(Note.__table__.insert(), {"origin": origin})
+
+    health = ReplicaHealth(engines["replica"], retry_seconds=60)
+    monkeypatch.setattr(session_module, "engine", engines["primary"])
+    monkeypatch.setattr(session_module, "replica_engine", engines["replica"])
+    monkeypatch.setattr(session_module, "replica_health", health)
+    yield health
+    for engine in engines.values():
+        engine.dispose()
+
+
+def origins(session) -> set[str]:
+    return set(session.scalars(select(Note.origin)))
+
+
+def test_reads_go_to_the_replica(routing):
+    with RoutingSession() as session:
+        assert origins(session) == {"replica"}
+    assert routing.stats()["reads"] == 1
+
+
+def test_session_moves_to_the_primary_after_a_flush(routing):
+    with RoutingSession() as session:
+        assert origins(session) == {"replica"}
+        session.add(Note(origin="written"))
+        session.flush()
+        assert origins(session) == {"primary", "written"}
+
+
+def test_falls_back_to_the_primary_while_the_replica_is_down(routing):
+    routing.mark_down()
+    with RoutingSession() as session:
+        assert origins(session) == {"primary"}
+    stats = routing.stats()
+    assert (stats["healthy"], stats["fallbacks"], stats["failures"], stats["reads"]) == (False, 1, 1, 0)
+
+    # Vencido el plazo, la prueba con SELECT 1 la devuelve al servicio
+    routing.retry_seconds = 0
+    routing.mark_down()
+    with RoutingSession() as session:
+        assert origins(session) == {"replica"}
@@ -0,0 +1,178 @@
+import hashlib
+import io
+import os
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from PIL import Image
+
+from app.core import storage as storage_module
+from app.core.images import DERIVATIVE_WIDTHS, build_derivatives
+from app.core.media_sweep import sweep_unreferenced_media
+from app.core.storage import FALLBACK_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL, S3Storage, derivative_keys
+from app.routes.media import content_addressed_name, _tmp_path
+
+
+class NotFound(Exception):
+    response = {"Error": {"Code": "404"}}
+
+
+class FakeS3Client:
+    """Lo que S3Storage usa de boto3, en memoria."""
+
+    def __init__(self):
+        self.objects: dict[str, dict] = {}
+        self.uploads = 0
+
+    def _store(self, key, body, content_type, cache_control):
+        self.objects[key] = {
+            "Body": body,
+            "ContentType": content_type,
+            "CacheControl": cache_control,
+            "LastModified": datetime.now(timezone.utc),
+        }
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        item = self.objects[Key]
+        return {"ContentType": item["ContentType"], "ContentLength": len(item["Body"]), "LastModified": item["LastModified"]}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs):
+        with open(Filename, "rb") as f:
+            self._store(Key, f.read(), ExtraArgs["ContentType"], ExtraArgs["CacheControl"])
+        self.uploads += 1
+
+    def download_file(self, Bucket, Key, Filename):
+        with open(Filename, "wb") as f:
+            f.write(self.objects[Key]["Body"])
+
+    def copy_object(self, Bucket, Key, CopySource, MetadataDirective, ContentType, CacheControl):
+        self._store(Key, self.objects[CopySource["Key"]]["Body"], ContentType, CacheControl)
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete["Objects"]:
+            self.objects.pop(item["Key"], None)
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        listing = [
+            {"Key": key, "Size": len(item["Body"])}
+            for key, item in sorted(self.objects.items())
+            if key.startswith(Prefix)
+        ]
+        for start in range(0, len(listing), 2):  # paginas chicas: se recorren todas
+            yield {"Contents": listing[start:start + 2]}
+
+
+@pytest.fixture
+def client_and_storage():
+    client = FakeS3Client()
+    return client, S3Storage("bucket", prefix="media", client=client)
+
+
+def put_png(storage, color="red", size=(800, 600)) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    data = buffer.getvalue()
+    tmp_path = _tmp_path()
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    key = content_addressed_name(hashlib.sha256(data).hexdigest(), "png")
+    storage.put(tmp_path, key)
+    return key
+
+
+def test_put_serves_original_at_derivative_urls(client_and_storage):
+    client, storage = client_and_storage
+    key = put_png(storage)
+
+    original = client.objects[f"media/{key}"]
+    assert original["ContentType"] == "image/png"
+    assert original["CacheControl"] == IMMUTABLE_CACHE_CONTROL
+    # MEDIA_DERIVATIVES=false en los tests: las derivadas quedan como copia del original
+    for derivative in derivative_keys(key):
+        item = client.objects[f"media/{derivative}"]
+        assert item["Body"] == original["Body"]
+        assert item["ContentType"] == "image/png"
+        assert item["CacheControl"] == FALLBACK_CACHE_CONTROL
+    assert client.uploads == 1
+
+
+def test_put_reuses_existing_key_and_refreshes_its_date(client_and_storage):
+    client, storage = client_and_storage
+    key = put_png(storage)
+    client.objects[f"media/{key}"]["LastModified"] -= timedelta(days=3)
+
+    put_png(storage)
+
+    assert client.uploads == 1
+    assert datetime.now(timezone.utc) - client.objects[f"media/{key}"]["LastModified"] < timedelta(minutes=1)
+
+
+def test_uploaded_derivatives_replace_the_fallback(client_and_storage):
+    client, storage = client_and_storage
+    key = put_png(storage)
+    stage_path = os.path.join(storage.stage_dir, key)
+    os.makedirs(os.path.dirname(stage_path), exist_ok=True)
+    with open(stage_path, "wb") as f:
+        f.write(client.objects[f"media/{key}"]["Body"])
+    future = Future()
+    future.set_result(build_derivatives(stage_path, tuple(DERIVATIVE_WIDTHS.values())))
+
+    storage._upload_derivatives(future, stage_path)
+
+    for derivative in derivative_keys(key):
+        item = client.objects[f"media/{derivative}"]
+        assert item["ContentType"] == "image/webp"
+        assert item["CacheControl"] == IMMUTABLE_CACHE_CONTROL
+    assert not os.path.exists(stage_path)
+
+
+def test_backfill_builds_missing_and_fallback_derivatives(client_and_storage):
+    client, storage = client_and_storage
+    first = put_png(storage, "red")
+    second = put_png(storage, "blue", size=(200, 100))
+    # Original subido antes de las copias de respaldo: sin ninguna derivada
+    for derivative in derivative_keys(second):
+        del client.objects[f"media/{derivative}"]
+
+    assert storage.backfill_derivatives() == 2
+    for key in (first, second):
+        for derivative in derivative_keys(key):
+            assert client.objects[f"media/{derivative}"]["ContentType"] == "image/webp"
+
+    uploads = client.uploads
+    assert storage.backfill_derivatives() == 0
+    assert client.uploads == uploads
+
+
+def test_list_and_delete_cover_derivatives(client_and_storage):
+    client, storage = client_and_storage
+    key = put_png(storage)
+
+    assert list(storage.list_keys()) == [key]
+    storage.delete(key)
+    assert client.objects == {}
+
+
+def test_object_keys_reject_traversal(client_and_storage):
+    _, storage = client_and_storage
+    with pytest.raises(ValueError):
+        storage.object_key("../secret.png")
+
+
+def test_sweeper_removes_unreferenced_s3_objects(client_and_storage, db, monkeypatch):
+    client, storage = client_and_storage
+    monkeypatch.setattr(storage_module, "_storage", storage)
+    orphan = put_png(storage, "green")
+    fresh = put_png(storage, "yellow")
+    client.objects[f"media/{orphan}"]["LastModified"] -= timedelta(days=2)
+
+    assert sweep_unreferenced_media(db, grace_seconds=24 * 60 * 60) == 1
+    assert list(storage.list_keys()) == [fresh]
+    assert not any(key.startswith(f"media/{orphan[:-4]}") for key in client.objects)
@@ -0,0 +1,127 @@
+import re
+
+import pytest
+
+from app.core.search import normalize_search_text
+from app.db.session import SessionLocal
+from app.models import Profile, ProfileGallery, User
+
+from tests.conftest import make_user
+
+PROFILES = [
+    ("José Núñez", "Arte Pop"),
+    ("MARÍA López", "acuarela"),
+    ("Lucía Ñandú", "Óleo sobre tela"),
+    ("joseph", None),
+    ("100% real_art", "street-art"),
+    ("Ana", "   "),
+    ("Raúl Arce", "Arte_Pop"),
+]
+
+
+def matches_normalized(value: str | None, search: str) -> bool:
+    # Filtro en Python que tenia /public/artists antes de pasar la busqueda a SQL
+    if not value:
+        return False
+    return normalize_search_text(search) in normalize_search_text(value)
+
+
+def old_artist_ids(db, search: str, search_field: str | None) -> set[int]:
+    rows = db.query(User.id, Profile.display_name, Profile.artistic_style).join(Profile, Profile.user_id == User.id).filter(User.role == "artist")
+    ids = set()
+    for user_id, name, style in rows:
+        if search_field == "name":
+            hit = matches_normalized(name, search)
+        elif search_field == "style":
+            hit = matches_normalized(style, search)
+        else:
+            hit = matches_normalized(name, search) or matches_normalized(style, search)
+        if hit:
+            ids.add(user_id)
+    return ids
+
+
+def sql_like(value: str, pattern: str) -> bool:
+    # LIKE sin ESCAPE: % y _ son comodines
+    regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.fullmatch(regex, value, re.IGNORECASE | re.DOTALL) is not None
+
+
+def old_artwork_ids(db, search: str, search_field: str | None) -> set[int]:
+    # Antes: LIKE sobre display_name normalizado en SQL (lower + REPLACE) y LIKE tal cual sobre
+    # artistic_style
+    rows = db.query(ProfileGallery.id, Profile.display_name).join(Profile, Profile.user_id == ProfileGallery.user_id)
+    name_ids = {
+        gallery_id for gallery_id, name in rows
+        if sql_like(normalize_search_text(name), f"%{normalize_search_text(search)}%")
+    }
+    style_ids = {gallery_id for (gallery_id,) in rows.with_entities(ProfileGallery.id).filter(Profile.artistic_style.like(f"%{search.strip()}%"))}
+    if search_field == "name":
+        return name_ids
+    if search_field == "style":
+        return style_ids
+    return name_ids | style_ids
+
+
+def page_ids(client, path: str, key: str, params: dict) -> set[int]:
+    ids, page = set(), 1
+    while True:
+        body = client.get(path, params={**params, "size": 50, "page": page}).json()
+        ids.update(item[key] for item in body["items"])
+        if page * 50 >= body["total"]:
+            return ids
+        page += 1
+
+
+def new_artist_ids(client, search: str, search_field: str | None) -> set[int]:
+    params = {"search": search}
+    if search_field:
+        params["search_field"] = search_field
+    return page_ids(client, "/public/artists", "user_id", params)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def search_profiles():
+    db = SessionLocal()
+    try:
+        for name, style in PROFILES:
+            user, _ = make_user(db, "artist", gallery=1)
+            user.profile.display_name = name
+            user.profile.artistic_style = style
+        db.commit()
+    finally:
+        db.close()
+
+
+SEARCH_FIELDS = [None, "name", "style", "otro"]
+SEARCHES = [
+    "jose", "JOSÉ", "osé", "nuñ", "NUÑEZ", "ucia", "cía ñan", "maria lop", "ez ma",
+    "a", "ñ", "   ", " pop ", "Arte", "pop arte", "100%", "l_a", "leo sobre", "-art", "zzz",
+]
+
+
+@pytest.mark.parametrize("search_field", SEARCH_FIELDS)
+@pytest.mark.parametrize("search", SEARCHES)
+def test_artist_search_matches_previous_result_set(client, db, search, search_field):
+    assert new_artist_ids(client, search, search_field) == old_artist_ids(db, search, search_field)
+
+
+@pytest.mark.parametrize("search_field", SEARCH_FIELDS)
+@pytest.mark.parametrize("search", SEARCHES)
+def test_artwork_search_matches_previous_result_set(client, db, search, search_field):
+    params = {"search": search}
+    if search_field:
+        params["search_field"] = search_field
+    assert page_ids(client, "/public/artworks", "gallery_id", params) == old_artwork_ids(db, search, search_field)
+
+
+def test_renamed_profile_is_found_by_new_name_only(client, db):
+    user, _ = make_user(db, "artist")
+    user.profile.display_name = "Xóchitl Quetzal"
+    db.commit()
+    assert user.id in new_artist_ids(client, "xochitl", "name")
+
+    user.profile.display_name = "Itzel Cuauhtli"
+    db.commit()
+    assert user.id not in new_artist_ids(client, "xochitl", "name")
+    assert user.id in new_artist_ids(client, "uauht", "name")